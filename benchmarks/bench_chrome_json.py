@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark: streaming Chrome JSON profile reader vs. json.load
+
+Usage:
+  python benchmarks/bench_chrome_json.py [--entries N] [--folders N]
+
+Writes the bookmarks of bench_chrome_parser's synthetic HTML export as a
+Chrome profile Bookmarks file (with the guid, id, meta_info and
+sync_metadata fields Chrome stores), checks that the JSON reader finds
+the same URLs, folder tags and titles as the HTML parser and as a
+json.load based walk of the tree, then reports parse time and peak
+traced memory of both readers when parsing from disk. Exits with status
+1 if the outputs differ.
+"""
+
+import argparse
+import base64
+import io
+import json
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from linkding_tools import iter_chrome_json_bookmarks, iter_netscape_bookmarks  # noqa: E402
+from bench_chrome_parser import generate_export  # noqa: E402
+
+
+def generate_profile(entries, folders, seed=42):
+    """Chrome Bookmarks file holding the same tree as generate_export()"""
+    rng = random.Random(seed)
+    bytes(rng.getrandbits(8) for _ in range(700))   # generate_export draws its icon first
+    ids = iter(range(1, 10 ** 9))
+
+    def node(**fields):
+        number = next(ids)
+        return {"date_added": "13340000000000000", "date_last_used": "0",
+                "guid": f"00000000-0000-4000-8000-{number:012d}", "id": str(number), **fields}
+
+    bar = node(children=[], name="Bookmarks bar", type="folder")
+    per_folder = max(1, entries // max(1, folders))
+    written = 0
+    folder = 0
+    while written < entries:
+        parent = bar
+        for d in range(2, 2 + rng.randint(0, 2) + 1):
+            child = node(children=[], name=f"Folder {folder} & level {d}", type="folder")
+            parent["children"].append(child)
+            parent = child
+        for _ in range(min(per_folder, entries - written)):
+            meta = {"meta_info": {"last_visited_desktop": "13340000000000000"}} if written % 2 else {}
+            parent["children"].append(node(**meta, name=f"Page {written}", type="url",
+                                           url=f"https://example.com/{written}?a=1"))
+            written += 1
+        folder += 1
+
+    other = node(children=[], name="Other bookmarks", type="folder")
+    synced = node(children=[], name="Mobile bookmarks", type="folder")
+    sync_metadata = base64.b64encode(bytes(rng.getrandbits(8) for _ in range(1 << 16))).decode('ascii')
+    return json.dumps({"checksum": "0" * 32, "roots": {"bookmark_bar": bar, "other": other, "synced": synced},
+                       "sync_metadata": sync_metadata, "version": 1}, indent=3)
+
+
+def load_profile(f):
+    """Reference reader: json.load the whole file and walk the tree"""
+    def walk(item, path):
+        if item["type"] == "url":
+            yield {"url": item["url"], "tags": path, "title": item["name"]}
+        else:
+            for child in item["children"]:
+                yield from walk(child, path + (item["name"],))
+
+    for root in json.load(f)["roots"].values():
+        yield from walk(root, ())
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def peak_memory(func):
+    """Peak traced allocation in MB while running func"""
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1e6
+
+
+def from_disk(reader, path):
+    with open(path, 'rb') as f:
+        return sum(1 for _ in reader(f))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entries', type=int, default=200_000, help='Number of bookmarks (default: 200000)')
+    parser.add_argument('--folders', type=int, default=2_000, help='Number of leaf folders (default: 2000)')
+    args = parser.parse_args()
+
+    data = generate_profile(args.entries, args.folders).encode('utf-8')
+    print(f"Synthetic profile: {args.entries} bookmarks, {len(data) / 1e6:.1f} MB")
+
+    def key(bookmarks):
+        return [(b['url'], tuple(b['tags']), b['title']) for b in bookmarks]
+
+    html = key(iter_netscape_bookmarks(io.BytesIO(generate_export(args.entries, args.folders).encode('utf-8'))))
+    loaded, loaded_time = timed(lambda: key(load_profile(io.BytesIO(data))))
+    streaming, streaming_time = timed(lambda: key(iter_chrome_json_bookmarks(io.BytesIO(data))))
+    same = streaming == loaded == html
+
+    print(f"{'reader':<24}{'seconds':>10}{'bookmarks/s':>16}{'found':>10}")
+    for name, seconds, found in (('json.load', loaded_time, len(loaded)), ('streaming', streaming_time, len(streaming))):
+        print(f"{name:<24}{seconds:>10.3f}{found / seconds:>16,.0f}{found:>10}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'Bookmarks'
+        path.write_bytes(data)
+        del html, loaded, streaming, data
+        print(f"\nPeak memory parsing from disk: json.load {peak_memory(lambda: from_disk(load_profile, path)):.1f} MB, "
+              f"streaming {peak_memory(lambda: from_disk(iter_chrome_json_bookmarks, path)):.1f} MB")
+
+    print(f"\nSame bookmarks as json.load and the HTML export: {same}")
+    return 0 if same else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
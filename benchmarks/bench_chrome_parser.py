@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Benchmark: streaming Netscape bookmark parser vs. the old line-based parser
+
+Usage:
+  python benchmarks/bench_chrome_parser.py [--entries N] [--folders N]
+
+Generates a synthetic Chrome bookmark export (half of the entries carry a
+base64 ICON attribute, as real exports do), checks that both parsers agree
+on URLs and folder tags, then reports parse time, throughput and peak
+traced memory when parsing from disk. The old parser also runs on a
+minified copy of the file to show where indentation based depth tracking
+breaks.
+"""
+
+import argparse
+import base64
+import io
+import random
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from linkding_tools import iter_netscape_bookmarks  # noqa: E402
+
+
+def legacy_parse_chrome_bookmarks(html_content):
+    """Line-based parser as shipped before the streaming tokenizer (reference)"""
+    bookmarks = []
+    folder_stack = []
+    lines = html_content.split('\n')
+    
+    for i, line in enumerate(lines):
+        line_stripped = line.strip()
+        indent_level = (len(line) - len(line.lstrip())) // 4
+        
+        if '</DL>' in line_stripped:
+            if indent_level > 0:
+                folder_stack = folder_stack[:indent_level-1]
+        
+        elif '<H3' in line_stripped:
+            h3_match = re.search(r'>([^<]+)<', line_stripped)
+            if h3_match:
+                folder_name = h3_match.group(1).strip()
+                folder_name = folder_name.replace('&amp;', '&')
+                folder_name = folder_name.replace('&lt;', '<')
+                folder_name = folder_name.replace('&gt;', '>')
+                folder_name = folder_name.replace('&quot;', '"')
+                folder_name = folder_name.replace('&apos;', "'")
+                folder_stack = folder_stack[:indent_level] + [folder_name]
+        
+        elif '<A HREF=' in line_stripped:
+            url_match = re.search(r'HREF="([^"]+)"', line_stripped)
+            text_match = re.search(r'>([^<]+)<', line_stripped)
+            
+            if url_match:
+                url = url_match.group(1)
+                title = text_match.group(1) if text_match else ""
+                
+                if url.startswith('http://') or url.startswith('https://'):
+                    tags = folder_stack[:indent_level] if indent_level > 0 else []
+                    bookmarks.append({
+                        'url': url,
+                        'tags': tags,
+                        'title': title
+                    })
+    
+    return bookmarks
+
+
+def generate_export(entries, folders, seed=42):
+    """Build a Chrome-style export with the given number of bookmarks"""
+    rng = random.Random(seed)
+    out = [
+        '<!DOCTYPE NETSCAPE-Bookmark-file-1>',
+        '<META HTTP-EQUIV="Content-Type" CONTENT="text/html; charset=UTF-8">',
+        '<TITLE>Bookmarks</TITLE>',
+        '<H1>Bookmarks</H1>',
+        '<DL><p>',
+        '    <DT><H3 ADD_DATE="1700000000" LAST_MODIFIED="1700000000" PERSONAL_TOOLBAR_FOLDER="true">Bookmarks bar</H3>',
+        '    <DL><p>',
+    ]
+    icon = base64.b64encode(bytes(rng.getrandbits(8) for _ in range(700))).decode('ascii')
+    per_folder = max(1, entries // max(1, folders))
+    written = 0
+    folder = 0
+    while written < entries:
+        depth = 2 + rng.randint(0, 2)
+        for d in range(2, depth + 1):
+            out.append('    ' * d + f'<DT><H3 ADD_DATE="1700000000">Folder {folder} &amp; level {d}</H3>')
+            out.append('    ' * d + '<DL><p>')
+        for _ in range(min(per_folder, entries - written)):
+            icon_attr = f' ICON="data:image/png;base64,{icon}"' if written % 2 else ''
+            out.append('    ' * (depth + 1)
+                       + f'<DT><A HREF="https://example.com/{written}?a=1" ADD_DATE="1700000000"{icon_attr}>'
+                       f'Page {written}</A>')
+            written += 1
+        for d in range(depth, 1, -1):
+            out.append('    ' * d + '</DL><p>')
+        folder += 1
+    out += ['    </DL><p>', '</DL><p>']
+    return '\n'.join(out) + '\n'
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def peak_memory(func):
+    """Peak traced allocation in MB while running func"""
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1e6
+
+
+def legacy_from_disk(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return len(legacy_parse_chrome_bookmarks(f.read()))
+
+
+def streaming_from_disk(path):
+    with open(path, 'rb') as f:
+        return sum(1 for _ in iter_netscape_bookmarks(f))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entries', type=int, default=200_000, help='Number of bookmarks (default: 200000)')
+    parser.add_argument('--folders', type=int, default=2_000, help='Number of leaf folders (default: 2000)')
+    args = parser.parse_args()
+    
+    content = generate_export(args.entries, args.folders)
+    data = content.encode('utf-8')
+    minified = re.sub(r'\n\s*', '', content).encode('utf-8')
+    print(f"Synthetic export: {args.entries} bookmarks, {len(data) / 1e6:.1f} MB")
+    
+    legacy, legacy_time = timed(lambda: legacy_parse_chrome_bookmarks(content))
+    streaming, streaming_time = timed(lambda: list(iter_netscape_bookmarks(io.BytesIO(data))))
+    minified_result, minified_time = timed(lambda: list(iter_netscape_bookmarks(io.BytesIO(minified))))
+    legacy_minified = legacy_parse_chrome_bookmarks(minified.decode('utf-8'))
+    
+    same = [(b['url'], list(b['tags'])) for b in legacy] == [(b['url'], list(b['tags'])) for b in streaming]
+    same_minified = [(b['url'], b['tags']) for b in streaming] == [(b['url'], b['tags']) for b in minified_result]
+    
+    print(f"{'parser':<24}{'seconds':>10}{'bookmarks/s':>16}{'found':>10}")
+    for name, seconds, found in (
+        ('line-based (old)', legacy_time, len(legacy)),
+        ('streaming', streaming_time, len(streaming)),
+        ('streaming, minified', minified_time, len(minified_result)),
+    ):
+        print(f"{name:<24}{seconds:>10.3f}{found / seconds:>16,.0f}{found:>10}")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'bookmarks.html'
+        path.write_bytes(data)
+        del legacy, streaming, minified_result
+        print(f"\nPeak memory parsing from disk: line-based {peak_memory(lambda: legacy_from_disk(path)):.1f} MB, "
+              f"streaming {peak_memory(lambda: streaming_from_disk(path)):.1f} MB")
+    
+    print(f"\nOutputs identical (indented input): {same}")
+    print(f"Streaming parser stable under minification: {same_minified}")
+    print(f"Old parser on minified input found {len(legacy_minified)} of {args.entries} bookmarks")
+    return 0 if same and same_minified else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
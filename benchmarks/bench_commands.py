@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark: run linkding-tools commands against a local mock server
+
+Usage:
+  python benchmarks/bench_commands.py [--sizes 1000 10000 100000 1000000]
+                                      [--commands upload-markdown upload-jsonl import-chrome rename-tag]
+                                      [--latency 0.002] [--error-rate 0] [--rate-limit 0]
+                                      [--duplicates reject|update] [--duplicate-ratio 0.1]
+                                      [-j 8] [--max-rate 0] [--output results.json]
+
+For every command and size a dataset is generated in a temporary directory
+(a Markdown link list, a JSONL file, a Chrome bookmarks export, or for
+rename-tag bookmarks seeded directly into the server). The command then
+runs in a subprocess against mock_server.MockLinkding, with its output
+discarded and its cache directory isolated.
+
+Results are printed as JSON (and written to --output), one entry per run:
+items/s, wall time, request count, p50/p99 server-side request latency,
+HTTP status counts, connections opened and the peak RSS of the command
+process, so results from different versions can be compared directly.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from mock_server import MockLinkding  # noqa: E402
+
+ROOT = Path(__file__).resolve().parent.parent
+COMMANDS = ('upload-markdown', 'upload-jsonl', 'import-chrome', 'rename-tag')
+
+
+def dataset_url(i):
+    return f"https://site-{i % 997}.example.com/articles/{i}?ref=bench"
+
+
+def dataset_tags(i):
+    return [f"topic-{i % 50}", f"sub-{i % 7}"]
+
+
+def write_markdown(path, n):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("# Benchmark links\n\n")
+        for i in range(n):
+            if i % 100 == 0:
+                f.write(f"\n## Section {i // 100 % 50}\n\n### Topic {i % 7}\n\n")
+            if i % 3 == 0:
+                f.write(f"- {dataset_url(i)}\n")
+            else:
+                f.write(f"- [Article {i}]({dataset_url(i)}) - some description\n")
+
+
+def write_jsonl(path, n):
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(n):
+            f.write(json.dumps({"url": dataset_url(i), "tag_names": dataset_tags(i)}) + '\n')
+
+
+def write_chrome(path, n):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('<!DOCTYPE NETSCAPE-Bookmark-file-1>\n<TITLE>Bookmarks</TITLE>\n<H1>Bookmarks</H1>\n<DL><p>\n')
+        f.write('    <DT><H3 ADD_DATE="1700000000" PERSONAL_TOOLBAR_FOLDER="true">Bookmarks bar</H3>\n    <DL><p>\n')
+        for i in range(n):
+            if i % 100 == 0:
+                if i:
+                    f.write('            </DL><p>\n        </DL><p>\n')
+                f.write(f'        <DT><H3 ADD_DATE="1700000000">Folder {i // 100 % 50}</H3>\n        <DL><p>\n')
+                f.write(f'            <DT><H3 ADD_DATE="1700000000">Topic {i % 7}</H3>\n            <DL><p>\n')
+            f.write(f'                <DT><A HREF="{dataset_url(i)}" ADD_DATE="1700000000">Article {i}</A>\n')
+        if n:
+            f.write('            </DL><p>\n        </DL><p>\n')
+        f.write('    </DL><p>\n</DL><p>\n')
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def run_command(argv, env):
+    """
+    Run linkding-tools in a subprocess
+    Returns: (exit_code, seconds, peak_rss_mb) - peak RSS is None where wait4 is unavailable
+    """
+    started = time.perf_counter()
+    with tempfile.TemporaryFile() as stderr:
+        proc = subprocess.Popen([sys.executable, str(ROOT / 'linkding-tools.py')] + argv,
+                                env=env, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=stderr)
+        if hasattr(os, 'wait4'):
+            _, status, usage = os.wait4(proc.pid, 0)
+            proc.returncode = os.waitstatus_to_exitcode(status) if hasattr(os, 'waitstatus_to_exitcode') else status >> 8
+            # ru_maxrss is in KiB on Linux, bytes on macOS
+            scale = 1 if sys.platform == 'darwin' else 1024
+            peak_rss = round(usage.ru_maxrss * scale / 2 ** 20, 1)
+        else:
+            proc.wait()
+            peak_rss = None
+        seconds = time.perf_counter() - started
+        if proc.returncode:
+            stderr.seek(0)
+            sys.stderr.write(stderr.read().decode('utf-8', 'replace')[-2000:])
+    return proc.returncode, seconds, peak_rss
+
+
+def bench(server, command, size, workdir, args):
+    """Prepare the dataset for one run, execute it and collect the measurements"""
+    server.reset()
+    common = ['-y', '-j', str(args.concurrency), '--max-rate', str(args.max_rate)]
+
+    if command == 'rename-tag':
+        for i in range(size):
+            server.store.add(dataset_url(i), ['bench-old'] + dataset_tags(i))
+        argv = ['rename-tag', 'bench-old', 'bench-new'] + common
+    else:
+        suffix = {'upload-markdown': '.md', 'upload-jsonl': '.jsonl', 'import-chrome': '.html'}[command]
+        path = workdir / f"{command}-{size}{suffix}"
+        if not path.exists():
+            {'upload-markdown': write_markdown, 'upload-jsonl': write_jsonl, 'import-chrome': write_chrome}[command](path, size)
+        # Pre-existing URLs exercise the duplicate path
+        for i in random.Random(size).sample(range(size), int(size * args.duplicate_ratio)):
+            server.store.add(dataset_url(i), [])
+        argv = [command, str(path)] + common + ['--no-canonicalize']
+
+    server.reset_stats()
+    env = dict(os.environ, LINKDING_URL=server.url, LINKDING_TOKEN='benchmark',
+               XDG_CACHE_HOME=str(workdir / f"cache-{command}-{size}"))
+    exit_code, seconds, peak_rss = run_command(argv + args.extra_args, env)
+
+    stats = server.stats()
+    latencies = sorted(stats["latencies"])
+    return {
+        "command": command,
+        "items": size,
+        "exit_code": exit_code,
+        "seconds": round(seconds, 3),
+        "items_per_s": round(size / seconds, 1) if seconds else None,
+        "requests": stats["requests"],
+        "requests_per_s": round(stats["requests"] / seconds, 1) if seconds else None,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50) * 1000, 2) if latencies else None,
+            "p99": round(percentile(latencies, 0.99) * 1000, 2) if latencies else None,
+        },
+        "status_counts": stats["status_counts"],
+        "connections": stats["connections"],
+        "peak_rss_mb": peak_rss,
+        "server_bookmarks": len(server.store.bookmarks),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000],
+                        help='Dataset sizes (default: 1000 10000)')
+    parser.add_argument('--commands', nargs='+', choices=COMMANDS, default=list(COMMANDS),
+                        help='Commands to run (default: all)')
+    parser.add_argument('--latency', type=float, default=0.002, help='Mock server latency per request in seconds (default: 0.002)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of writes answered with 503 (default: 0)')
+    parser.add_argument('--rate-limit', type=float, default=0, help='Mock server 429 threshold in requests/s (default: off)')
+    parser.add_argument('--duplicates', choices=('reject', 'update'), default='reject',
+                        help='Mock server answer to a POST of an existing URL (default: reject)')
+    parser.add_argument('--duplicate-ratio', type=float, default=0.0,
+                        help='Fraction of the dataset already on the server before an upload (default: 0)')
+    parser.add_argument('-j', '--concurrency', type=int, default=8, help='Value passed to -j (default: 8)')
+    parser.add_argument('--max-rate', type=float, default=0, help='Value passed to --max-rate (default: 0, no limit)')
+    parser.add_argument('--output', help='Also write the JSON results to this file')
+    parser.add_argument('extra_args', nargs=argparse.REMAINDER,
+                        help='Extra arguments for every command, after "--"')
+    args = parser.parse_args()
+    args.extra_args = [a for a in args.extra_args if a != '--']
+
+    server = MockLinkding(latency=args.latency, error_rate=args.error_rate,
+                          duplicates=args.duplicates, rate_limit=args.rate_limit, seed=0).start()
+    results = []
+    try:
+        with tempfile.TemporaryDirectory(prefix='linkding-bench-') as tmp:
+            for size in args.sizes:
+                for command in args.commands:
+                    print(f"{command} x {size}...", end=' ', file=sys.stderr, flush=True)
+                    result = bench(server, command, size, Path(tmp), args)
+                    results.append(result)
+                    print(f"{result['items_per_s']} items/s, p50 {result['latency_ms']['p50']} ms, "
+                          f"p99 {result['latency_ms']['p99']} ms, {result['connections']} connections, "
+                          f"{result['peak_rss_mb']} MiB", file=sys.stderr)
+    finally:
+        server.stop()
+
+    report = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {
+            "latency": args.latency,
+            "error_rate": args.error_rate,
+            "rate_limit": args.rate_limit,
+            "duplicates": args.duplicates,
+            "duplicate_ratio": args.duplicate_ratio,
+            "concurrency": args.concurrency,
+            "max_rate": args.max_rate,
+            "extra_args": args.extra_args,
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output + '\n', encoding='utf-8')
+
+    return 1 if any(r["exit_code"] for r in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Benchmark: set-based Firefox places.sqlite reader vs. a row-by-row tree walk
+
+Usage:
+  python benchmarks/bench_firefox.py [--entries N] [--folders N]
+
+Builds a synthetic places.sqlite with Firefox's root folders, nested
+folders, separators, non-HTTP places and tags (stored, as Firefox does,
+as folders under the tags root). The bookmarks are read with
+iter_firefox_bookmarks (one recursive query) and with a walk that queries
+the children of each folder and the tags of each bookmark separately;
+the same tree is also written as a Firefox-style HTML export and parsed
+with iter_netscape_bookmarks. All three must agree on URLs, tags and
+titles; the script exits with status 1 if they differ.
+"""
+
+import argparse
+import html
+import io
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from linkding_tools import FIREFOX_ROOTS, iter_firefox_bookmarks, iter_netscape_bookmarks  # noqa: E402
+
+SCHEMA = """
+CREATE TABLE moz_places (id INTEGER PRIMARY KEY, url LONGVARCHAR, title LONGVARCHAR);
+CREATE TABLE moz_bookmarks (id INTEGER PRIMARY KEY, type INTEGER, fk INTEGER DEFAULT NULL,
+    parent INTEGER, position INTEGER, title LONGVARCHAR, dateAdded INTEGER, guid TEXT);
+CREATE INDEX moz_bookmarks_itemindex ON moz_bookmarks (fk, type);
+CREATE INDEX moz_bookmarks_parentindex ON moz_bookmarks (parent, position);
+CREATE UNIQUE INDEX moz_bookmarks_guid_uniqueindex ON moz_bookmarks (guid);
+"""
+
+ROOTS = [(1, 0, 'root________', ''), (2, 1, 'menu________', 'menu'), (3, 1, 'toolbar_____', 'toolbar'),
+         (4, 1, 'tags________', 'tags'), (5, 1, 'unfiled_____', 'unfiled'), (6, 1, 'mobile______', 'mobile')]
+
+
+def generate_places(path, entries, folders, seed=42):
+    """Write a places database with about `entries` bookmarks in `folders` folders"""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    rows = [(id_, 2, None, parent, 0, title, 0, guid) for id_, parent, guid, title in ROOTS]
+    positions = {}
+    next_id = len(ROOTS) + 1
+
+    def add(type_, parent, title, fk=None):
+        nonlocal next_id
+        position = positions.get(parent, 0)
+        positions[parent] = position + 1
+        rows.append((next_id, type_, fk, parent, position, title, 1700000000000000 + next_id, f"g{next_id:011d}"))
+        next_id += 1
+        return next_id - 1
+
+    containers = [2, 3, 5, 6]
+    for n in range(folders):
+        containers.append(add(2, rng.choice(containers), rng.choice([f"Folder {n} & co", f"文件夹 {n}", ''])))
+    tag_folders = [add(2, 4, f"tag-{n}") for n in range(50)]
+
+    places = []
+    for n in range(entries):
+        url = f"https://example.com/{n}?a=1" if n % 25 else f"place:parent=toolbar_____&n={n}"
+        places.append((n + 1, url, None))
+        if n % 40 == 0:
+            add(3, rng.choice(containers), None)
+        add(1, rng.choice(containers), f"Page <{n}>", fk=n + 1)
+        for tag_folder in rng.sample(tag_folders, rng.choice([0, 0, 1, 2])):
+            add(1, tag_folder, None, fk=n + 1)
+
+    conn.executemany("INSERT INTO moz_places VALUES (?, ?, ?)", places)
+    conn.executemany("INSERT INTO moz_bookmarks VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+
+def walk_places(path):
+    """Reference reader: one query per folder and per bookmark, as a tree walk would do"""
+    conn = sqlite3.connect(path)
+    tags_root = conn.execute("SELECT id FROM moz_bookmarks WHERE guid = 'tags________'").fetchone()[0]
+
+    def walk(folder, tags):
+        for id_, type_, fk, title in conn.execute(
+                "SELECT id, type, fk, title FROM moz_bookmarks WHERE parent = ? ORDER BY position", (folder,)).fetchall():
+            if type_ == 2:
+                name = (title or '').strip()
+                yield from walk(id_, tags + (name,) if name else tags)
+            elif type_ == 1:
+                url = conn.execute("SELECT url FROM moz_places WHERE id = ?", (fk,)).fetchone()[0]
+                if not url.startswith(('http://', 'https://')):
+                    continue
+                names = [row[0] for row in conn.execute(
+                    "SELECT tag.title FROM moz_bookmarks item JOIN moz_bookmarks tag ON tag.id = item.parent "
+                    "WHERE item.fk = ? AND item.type = 1 AND tag.parent = ? ORDER BY tag.title", (fk, tags_root))]
+                yield {'url': url, 'tags': tuple(dict.fromkeys(tags + tuple(names))), 'title': (title or '').strip()}
+
+    for guid, name in FIREFOX_ROOTS.items():
+        root = conn.execute("SELECT id FROM moz_bookmarks WHERE guid = ?", (guid,)).fetchone()[0]
+        yield from walk(root, (name,) if name else ())
+    conn.close()
+
+
+def export_html(path):
+    """The tree as Firefox writes it to bookmarks.html (menu entries at the top level)"""
+    conn = sqlite3.connect(path)
+    tags_root = conn.execute("SELECT id FROM moz_bookmarks WHERE guid = 'tags________'").fetchone()[0]
+    out = ['<!DOCTYPE NETSCAPE-Bookmark-file-1>', '<H1>Bookmarks Menu</H1>', '<DL><p>']
+
+    def write(folder):
+        for id_, type_, fk, title in conn.execute(
+                "SELECT id, type, fk, title FROM moz_bookmarks WHERE parent = ? ORDER BY position", (folder,)).fetchall():
+            if type_ == 2:
+                out.append(f'<DT><H3>{html.escape(title or "")}</H3>')
+                out.append('<DL><p>')
+                write(id_)
+                out.append('</DL><p>')
+            elif type_ == 1:
+                url = conn.execute("SELECT url FROM moz_places WHERE id = ?", (fk,)).fetchone()[0]
+                names = [row[0] for row in conn.execute(
+                    "SELECT tag.title FROM moz_bookmarks item JOIN moz_bookmarks tag ON tag.id = item.parent "
+                    "WHERE item.fk = ? AND item.type = 1 AND tag.parent = ? ORDER BY tag.title", (fk, tags_root))]
+                tags = f' TAGS="{",".join(names)}"' if names else ''
+                out.append(f'<DT><A HREF="{html.escape(url)}"{tags}>{html.escape(title or "")}</A>')
+            else:
+                out.append('<HR>')
+
+    for guid, name in FIREFOX_ROOTS.items():
+        root = conn.execute("SELECT id FROM moz_bookmarks WHERE guid = ?", (guid,)).fetchone()[0]
+        if name:
+            out += [f'<DT><H3>{name}</H3>', '<DL><p>']
+        write(root)
+        if name:
+            out.append('</DL><p>')
+    out.append('</DL>')
+    conn.close()
+    return '\n'.join(out).encode('utf-8')
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entries', type=int, default=100_000, help='Number of bookmarks (default: 100000)')
+    parser.add_argument('--folders', type=int, default=1_000, help='Number of folders (default: 1000)')
+    args = parser.parse_args()
+
+    def key(bookmarks):
+        return [(b['url'], tuple(b['tags']), b['title']) for b in bookmarks]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'places.sqlite'
+        generate_places(path, args.entries, args.folders)
+        print(f"Synthetic places.sqlite: {args.entries} bookmarks, {path.stat().st_size / 1e6:.1f} MB")
+
+        walked, walked_time = timed(lambda: key(walk_places(path)))
+        queried, queried_time = timed(lambda: key(iter_firefox_bookmarks(path)))
+        exported = key(iter_netscape_bookmarks(io.BytesIO(export_html(path))))
+
+    print(f"{'reader':<24}{'seconds':>10}{'bookmarks/s':>16}{'found':>10}")
+    for name, seconds, found in (('row-by-row walk', walked_time, len(walked)),
+                                 ('recursive query', queried_time, len(queried))):
+        print(f"{name:<24}{seconds:>10.3f}{found / seconds:>16,.0f}{found:>10}")
+
+    same = queried == walked == exported
+    print(f"\nSame bookmarks as the tree walk and the HTML export: {same}")
+    return 0 if same else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: single-pass Markdown link extractor vs. the old multi-regex one
+
+Usage:
+  python benchmarks/bench_markdown.py [--lines 10000 100000 1000000]
+
+For each size a synthetic link-list document is generated (nested section
+titles, Markdown links, bare URLs, bold titles, trailing punctuation and
+prose lines). Both extractors must return identical (url, tags) output;
+the script exits with status 1 if they differ or if the new extractor is
+slower than the old one, so it can be used as a regression guard.
+
+The largest document is also written to disk to compare peak traced
+memory of reading it as text (read + split) with the memory-mapped
+byte-level reader used by upload-markdown.
+"""
+
+import argparse
+import random
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from linkding_tools import (  # noqa: E402
+    extract_links_from_markdown, extract_links_from_markdown_file, is_valid_url,
+)
+
+
+def legacy_extract_links_from_markdown(content, base_tag):
+    """Extractor as shipped before the single-pass scanner (reference)"""
+    results = []
+    lines = content.split('\n')
+    current_sections = []
+    
+    for line in lines:
+        list_match = re.match(r'^(\s*)([-*+]|\d+\.)\s+(.+)$', line)
+        
+        if list_match:
+            indent = list_match.group(1)
+            content_text = list_match.group(3).strip()
+            level = len(indent) // 2 if indent else 0
+            
+            has_md_link = bool(re.search(r'\[([^\]]*)\]\(https?://', content_text))
+            
+            if has_md_link:
+                md_links = re.findall(r'\[([^\]]*)\]\((https?://[^\)]+)\)', content_text)
+                for text, url in md_links:
+                    url = re.sub(r'[,;。，；]+$', '', url)
+                    if is_valid_url(url):
+                        tags = [base_tag] + current_sections.copy() if base_tag else current_sections.copy()
+                        results.append((url, tags))
+            else:
+                has_plain_url = bool(re.search(r'https?://', content_text))
+                
+                if has_plain_url:
+                    plain_urls = re.findall(r'https?://[^\s\)]+', content_text)
+                    for url in plain_urls:
+                        url = re.sub(r'[,;。，；]+$', '', url)
+                        if is_valid_url(url):
+                            tags = [base_tag] + current_sections.copy() if base_tag else current_sections.copy()
+                            results.append((url, tags))
+                else:
+                    clean_title = content_text
+                    clean_title = re.sub(r'\*\*(.+?)\*\*', r'\1', clean_title)
+                    clean_title = re.sub(r'\[([^\]]+)\]\([^\)]+\)', r'\1', clean_title)
+                    
+                    if level >= len(current_sections):
+                        current_sections.append(clean_title)
+                    else:
+                        current_sections = current_sections[:level] + [clean_title]
+        else:
+            plain_urls = re.findall(r'https?://[^\s\)]+', line)
+            for url in plain_urls:
+                url = re.sub(r'[,;。，；]+$', '', url)
+                if is_valid_url(url):
+                    tags = [base_tag] + current_sections.copy() if base_tag else current_sections.copy()
+                    results.append((url, tags))
+    
+    return results
+
+
+def generate_document(lines, seed=42):
+    """Synthetic link list mixing every construct the extractor handles"""
+    rng = random.Random(seed)
+    out = ['# Links', '']
+    n = 0
+    while len(out) < lines:
+        kind = rng.random()
+        depth = rng.randint(0, 3)
+        indent = '  ' * depth
+        if kind < 0.08:
+            out.append(f"{indent}- **Section {n}** [docs](./local.md)")
+        elif kind < 0.15:
+            out.append(f"## Heading {n}")
+        elif kind < 0.55:
+            out.append(f"{indent}- [Page {n}](https://site{n % 500}.example.com/p/{n}?q={n}), see also")
+        elif kind < 0.70:
+            out.append(f"{indent}{n % 9 + 1}. https://example.org/{n}，https://example.net/{n};")
+        elif kind < 0.80:
+            out.append(f"Plain paragraph mentioning https://example.com/{n}) in passing.")
+        else:
+            out.append("Some prose without any link, just to make the document realistic.")
+        n += 1
+    return '\n'.join(out[:lines])
+
+
+def best_of(func, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def peak_memory(func):
+    """Peak traced allocation in MB while running func"""
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1e6
+
+
+def text_from_disk(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return extract_links_from_markdown(f.read(), 'bench')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+                        help='Document sizes in lines (default: 10000 100000 1000000)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement, best is reported (default: 3)')
+    args = parser.parse_args()
+    
+    ok = True
+    print(f"{'lines':>10}{'links':>10}{'old (s)':>12}{'new (s)':>12}{'speedup':>10}  identical")
+    for lines in args.lines:
+        content = generate_document(lines)
+        repeat = args.repeat if lines <= 100_000 else 1
+        legacy, legacy_time = best_of(lambda: legacy_extract_links_from_markdown(content, 'bench'), repeat)
+        current, current_time = best_of(lambda: extract_links_from_markdown(content, 'bench'), repeat)
+        identical = legacy == [(url, list(tags)) for url, tags in current]
+        ok = ok and identical and current_time <= legacy_time
+        print(f"{lines:>10}{len(current):>10}{legacy_time:>12.3f}{current_time:>12.3f}"
+              f"{legacy_time / current_time:>9.1f}x  {identical}")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'links.md'
+        path.write_text(content, encoding='utf-8')
+        size = path.stat().st_size / 1e6
+        del legacy, current, content
+        same = text_from_disk(path) == extract_links_from_markdown_file(path, 'bench')
+        ok = ok and same
+        print(f"\nPeak memory for a {size:.1f} MB file: read as text {peak_memory(lambda: text_from_disk(path)):.1f} MB, "
+              f"memory-mapped {peak_memory(lambda: extract_links_from_markdown_file(path, 'bench')):.1f} MB "
+              f"(identical: {same})")
+    
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
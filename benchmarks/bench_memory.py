@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark: interned Bookmark records vs. (url, [tags]) pairs
+
+Usage:
+  python benchmarks/bench_memory.py [--records 100000 1000000]
+
+For each size, synthetic Markdown, JSONL and Chrome inputs are parsed and
+deduplicated twice: once into the old representation (a tuple per link
+holding its own list of tag strings, as the parsers and dedupe_links used
+to produce) and once into the current one (__slots__ Bookmark records
+whose tags are shared tuples of interned tag ids). Both must yield the
+same URLs and tags; the script reports the memory held by the result and
+the peak traced memory while building it, and exits with status 1 if
+the outputs differ.
+"""
+
+import argparse
+import io
+import json
+import random
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+import linkding_tools  # noqa: E402
+from linkding_tools import (  # noqa: E402
+    Bookmark, JsonlReader, TagTable, canonicalize_url, dedupe_links,
+    extract_links_from_markdown, iter_netscape_bookmarks,
+)
+from bench_chrome_parser import generate_export  # noqa: E402
+from bench_markdown import generate_document, legacy_extract_links_from_markdown  # noqa: E402
+
+
+def legacy_dedupe_links(links):
+    """dedupe_links as shipped before Bookmark records (reference)"""
+    merged = {}
+    for url, tags in links:
+        key = canonicalize_url(url)
+        if key is None:
+            continue
+        existing = merged.get(key)
+        if existing is None:
+            merged[key] = (url, list(tags))
+        else:
+            existing[1].extend(t for t in tags if t not in existing[1])
+    return list(merged.values())
+
+
+def legacy_read_jsonl(path):
+    with open(path, 'rb') as f:
+        for raw in f:
+            data = json.loads(raw)
+            yield data["url"], data["tag_names"]
+
+
+def generate_jsonl(records, tags=300, seed=42):
+    """One bookmark per line with 1-4 tags from a fixed vocabulary"""
+    rng = random.Random(seed)
+    vocabulary = [f"topic-{i}" for i in range(tags)]
+    return ''.join(
+        json.dumps({"url": f"https://site{n % 997}.example.com/p/{n}", "tag_names": rng.sample(vocabulary, rng.randint(1, 4))}) + '\n'
+        for n in range(records)
+    )
+
+
+def measure(build):
+    """Returns: (result, MB held by the result, peak MB while building it)"""
+    linkding_tools._tag_table = TagTable()
+    tracemalloc.start()
+    result = build()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current / 1e6, peak / 1e6
+
+
+def sources(records, tmp):
+    """Yields: (name, legacy builder, current builder) for each input format"""
+    document = generate_document(int(records * 2.2))
+    yield (
+        'markdown',
+        lambda: legacy_dedupe_links(legacy_extract_links_from_markdown(document, 'bench')),
+        lambda: dedupe_links(extract_links_from_markdown(document, 'bench'))[0],
+    )
+
+    jsonl = tmp / 'bookmarks.jsonl'
+    jsonl.write_text(generate_jsonl(records), encoding='utf-8')
+    yield (
+        'jsonl',
+        lambda: legacy_dedupe_links(legacy_read_jsonl(jsonl)),
+        lambda: dedupe_links(JsonlReader(jsonl))[0],
+    )
+
+    export = generate_export(records, max(1, records // 100)).encode('utf-8')
+    yield (
+        'chrome',
+        lambda: legacy_dedupe_links((b['url'], list(b['tags'])) for b in iter_netscape_bookmarks(io.BytesIO(export))),
+        lambda: dedupe_links(Bookmark.from_tags(b['url'], b['tags']) for b in iter_netscape_bookmarks(io.BytesIO(export)))[0],
+    )
+
+
+def main():
+    import tempfile
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, nargs='+', default=[100_000, 1_000_000],
+                        help='Approximate number of bookmarks per input (default: 100000 1000000)')
+    args = parser.parse_args()
+
+    ok = True
+    print(f"{'input':<10}{'records':>10}{'held old':>12}{'held new':>12}{'peak old':>12}{'peak new':>12}  identical")
+    with tempfile.TemporaryDirectory() as tmp:
+        for records in args.records:
+            for name, legacy_build, current_build in sources(records, Path(tmp)):
+                legacy, legacy_held, legacy_peak = measure(legacy_build)
+                current, current_held, current_peak = measure(current_build)
+                identical = legacy == [(url, list(tags)) for url, tags in current]
+                ok = ok and identical
+                print(f"{name:<10}{len(current):>10}{legacy_held:>10.1f}MB{current_held:>10.1f}MB"
+                      f"{legacy_peak:>10.1f}MB{current_peak:>10.1f}MB  {identical}")
+                del legacy, current
+
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
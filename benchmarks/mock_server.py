@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Linkding REST API, for offline benchmarks
+
+Usage:
+  python benchmarks/mock_server.py [--port 8000] [--latency 0.005] [--error-rate 0.01]
+                                   [--duplicates reject|update] [--rate-limit 200]
+
+Implements the endpoints linkding-tools uses, backed by an in-memory store:
+
+  GET    /api/bookmarks/            limit, offset, q=#tag, modified_since
+  GET    /api/bookmarks/archived/   same
+  GET    /api/bookmarks/check/      url
+  GET    /api/bookmarks/<id>/
+  POST   /api/bookmarks/            create (duplicates: 400 or update)
+  PATCH  /api/bookmarks/<id>/       update fields
+  DELETE /api/bookmarks/<id>/
+
+Failure injection:
+  latency      seconds added to every request (plus up to 20% jitter)
+  error_rate   fraction of writes answered with 503
+  rate_limit   requests/s above which requests get 429 with Retry-After
+
+The server counts accepted connections and records the handling time of
+every request, which bench_commands.py turns into latency percentiles.
+Any token is accepted.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def utc_timestamp():
+    """Timestamp in the format Linkding uses for date_added / date_modified"""
+    now = time.time()
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(now)) + '.%06dZ' % int(now % 1 * 1e6)
+
+
+class BookmarkStore:
+    """In-memory bookmarks, keyed by id, with a cache of filtered listings"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.bookmarks = {}
+            self.by_url = {}
+            self.next_id = 1
+            self.version = 0
+            self._listings = {}
+
+    def add(self, url, tag_names, is_archived=False):
+        """Insert a bookmark without going through HTTP (used to seed datasets)"""
+        with self.lock:
+            return self._add(url, tag_names, is_archived)
+
+    def _add(self, url, tag_names, is_archived=False):
+        bookmark = {
+            "id": self.next_id,
+            "url": url,
+            "title": "",
+            "description": "",
+            "notes": "",
+            "is_archived": is_archived,
+            "unread": False,
+            "shared": False,
+            "tag_names": list(tag_names),
+            "date_added": utc_timestamp(),
+            "date_modified": utc_timestamp(),
+        }
+        self.next_id += 1
+        self.bookmarks[bookmark["id"]] = bookmark
+        self.by_url[url] = bookmark
+        self.version += 1
+        return bookmark
+
+    def listing(self, archived, query, modified_since):
+        """Filtered bookmark list, cached until the next write"""
+        key = (archived, query, modified_since)
+        with self.lock:
+            cached = self._listings.get(key)
+            if cached is not None and cached[0] == self.version:
+                return cached[1]
+
+            items = [b for b in self.bookmarks.values() if b["is_archived"] == archived]
+            for term in query.split():
+                if term.startswith('#'):
+                    tag = term[1:].lower()
+                    items = [b for b in items if tag in (t.lower() for t in b["tag_names"])]
+                else:
+                    items = [b for b in items if term.lower() in b["url"].lower()]
+            if modified_since:
+                items = [b for b in items if b["date_modified"] > modified_since]
+
+            self._listings[key] = (self.version, items)
+            return items
+
+    def create(self, data, duplicates):
+        """Returns: (status, body)"""
+        with self.lock:
+            existing = self.by_url.get(data.get("url"))
+            if existing is not None:
+                if duplicates == "reject":
+                    return 400, {"url": ["Bookmark with this URL already exists."]}
+                existing["tag_names"] = list(data.get("tag_names", []))
+                existing["date_modified"] = utc_timestamp()
+                self.version += 1
+                return 201, existing
+            bookmark = self._add(data["url"], data.get("tag_names", []), data.get("is_archived", False))
+            bookmark.update({k: data[k] for k in ("title", "description", "notes", "unread", "shared") if k in data})
+            return 201, bookmark
+
+    def update(self, bookmark_id, data):
+        with self.lock:
+            bookmark = self.bookmarks.get(bookmark_id)
+            if bookmark is None:
+                return 404, {"detail": "Not found."}
+            bookmark.update({k: v for k, v in data.items() if k not in ("id", "url")})
+            bookmark["date_modified"] = utc_timestamp()
+            self.version += 1
+            return 200, bookmark
+
+    def delete(self, bookmark_id):
+        with self.lock:
+            bookmark = self.bookmarks.pop(bookmark_id, None)
+            if bookmark is None:
+                return 404
+            self.by_url.pop(bookmark["url"], None)
+            self.version += 1
+            return 204
+
+
+class Throttle:
+    """Fixed one-second window request counter for 429 injection"""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.lock = threading.Lock()
+        self.window = 0
+        self.count = 0
+
+    def allow(self):
+        if not self.rate:
+            return True
+        with self.lock:
+            now = int(time.monotonic())
+            if now != self.window:
+                self.window = now
+                self.count = 0
+            self.count += 1
+            return self.count <= self.rate
+
+
+class MockLinkding:
+    """
+    Mock Linkding server running on a background thread
+
+        server = MockLinkding(latency=0.005).start()
+        ... run commands against server.url ...
+        stats = server.stats()
+        server.stop()
+    """
+
+    def __init__(self, latency=0.0, error_rate=0.0, duplicates="reject", rate_limit=0, seed=None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.duplicates = duplicates
+        self.throttle = Throttle(rate_limit)
+        self.random = random.Random(seed)
+        self.store = BookmarkStore()
+        self.httpd = None
+        self.thread = None
+        self.stats_lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self.stats_lock:
+            self.connections = 0
+            self.latencies = []
+            self.status_counts = {}
+
+    def reset(self):
+        """Empty the store and the counters"""
+        self.store.reset()
+        self.reset_stats()
+
+    def stats(self):
+        """Returns: {"connections", "requests", "status_counts", "latencies"} since the last reset"""
+        with self.stats_lock:
+            return {
+                "connections": self.connections,
+                "requests": len(self.latencies),
+                "status_counts": dict(self.status_counts),
+                "latencies": list(self.latencies),
+            }
+
+    def _record(self, status, elapsed):
+        with self.stats_lock:
+            self.latencies.append(elapsed)
+            self.status_counts[str(status)] = self.status_counts.get(str(status), 0) + 1
+
+    def start(self, host='127.0.0.1', port=0):
+        self.httpd = ThreadingHTTPServer((host, port), make_handler(self))
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def stop(self):
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+
+
+def make_handler(server):
+    """Request handler class bound to a MockLinkding instance"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Small JSON responses would otherwise wait for the client's delayed ACK
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            super().setup()
+            with server.stats_lock:
+                server.connections += 1
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, payload=None, headers=None):
+            body = b'' if payload is None else json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+            server._record(status, time.perf_counter() - self._started)
+
+        def _read_json(self):
+            return json.loads(self._raw_body) if self._raw_body else {}
+
+        def _prepare(self, write=False):
+            """Inject latency, throttling and errors; returns False if a response was sent"""
+            self._started = time.perf_counter()
+            # Always consume the body, or it would be parsed as the next request
+            length = int(self.headers.get('Content-Length') or 0)
+            self._raw_body = self.rfile.read(length) if length else b''
+            if server.latency:
+                time.sleep(server.latency * (1 + 0.2 * server.random.random()))
+            if not server.throttle.allow():
+                self._send(429, {"detail": "Request was throttled."}, {"Retry-After": "1"})
+                return False
+            if write and server.error_rate and server.random.random() < server.error_rate:
+                self._send(503, {"detail": "Service unavailable"})
+                return False
+            return True
+
+        def _bookmark_id(self, path):
+            try:
+                return int(path.rstrip('/').rsplit('/', 1)[-1])
+            except ValueError:
+                return None
+
+        def do_GET(self):
+            if not self._prepare():
+                return
+            parsed = urlparse(self.path)
+            query = parse_qs(parsed.query)
+
+            if parsed.path == '/api/bookmarks/check/':
+                with server.store.lock:
+                    bookmark = server.store.by_url.get(query.get('url', [''])[0])
+                return self._send(200, {"bookmark": bookmark, "metadata": {}, "auto_tags": []})
+
+            if parsed.path in ('/api/bookmarks/', '/api/bookmarks/archived/'):
+                limit = int(query.get('limit', ['100'])[0])
+                offset = int(query.get('offset', ['0'])[0])
+                items = server.store.listing(
+                    parsed.path.endswith('archived/'),
+                    query.get('q', [''])[0],
+                    query.get('modified_since', [None])[0],
+                )
+                page = items[offset:offset + limit]
+                next_url = None
+                if offset + limit < len(items):
+                    next_url = f"{parsed.path}?limit={limit}&offset={offset + limit}"
+                return self._send(200, {"count": len(items), "next": next_url, "previous": None, "results": page})
+
+            bookmark_id = self._bookmark_id(parsed.path)
+            with server.store.lock:
+                bookmark = server.store.bookmarks.get(bookmark_id)
+            if bookmark is not None:
+                return self._send(200, bookmark)
+            self._send(404, {"detail": "Not found."})
+
+        def do_POST(self):
+            if not self._prepare(write=True):
+                return
+            if urlparse(self.path).path != '/api/bookmarks/':
+                return self._send(404, {"detail": "Not found."})
+            try:
+                data = self._read_json()
+            except ValueError:
+                return self._send(400, {"detail": "Invalid JSON"})
+            if not data.get("url"):
+                return self._send(400, {"url": ["This field is required."]})
+            status, payload = server.store.create(data, server.duplicates)
+            self._send(status, payload)
+
+        def do_PATCH(self):
+            if not self._prepare(write=True):
+                return
+            bookmark_id = self._bookmark_id(urlparse(self.path).path)
+            try:
+                data = self._read_json()
+            except ValueError:
+                return self._send(400, {"detail": "Invalid JSON"})
+            status, payload = server.store.update(bookmark_id, data)
+            self._send(status, payload)
+
+        def do_DELETE(self):
+            if not self._prepare(write=True):
+                return
+            status = server.store.delete(self._bookmark_id(urlparse(self.path).path))
+            self._send(status, None if status == 204 else {"detail": "Not found."})
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8000, help='Port to listen on (default: 8000)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every request (default: 0)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of writes answered with 503 (default: 0)')
+    parser.add_argument('--duplicates', choices=('reject', 'update'), default='reject',
+                        help='Answer to a POST of an existing URL: 400 or update the bookmark (default: reject)')
+    parser.add_argument('--rate-limit', type=float, default=0, help='Requests/s before answering 429 (default: off)')
+    args = parser.parse_args()
+
+    server = MockLinkding(args.latency, args.error_rate, args.duplicates, args.rate_limit).start(args.host, args.port)
+    print(f"Mock Linkding listening on {server.url} (any token is accepted), Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(1)
+            stats = server.stats()
+            print(f"\r  {stats['connections']} connections, {stats['requests']} requests", end='', flush=True)
+    except KeyboardInterrupt:
+        print()
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -5,20 +5,31 @@ Supported features:
   - upload-markdown: Extract links from Markdown file and upload
   - upload-jsonl: Upload links from JSONL file
   - import-chrome: Import Chrome bookmarks
+  - import-firefox: Import Firefox bookmarks
   - rename-tag: Batch rename tags
+  - rewrite-tags: Apply a whole tag mapping file in one pass
+  - export: Export all bookmarks to JSONL or Netscape HTML
 """
 
 import argparse
+import bisect
+import io
 import json
 import os
 import re
-import ssl
 import sys
-import http.client
+import threading
 import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from functools import lru_cache
 from pathlib import Path
 from urllib.parse import urlparse, quote
 
+# ssl, http.client, sqlite3, hashlib, concurrent.futures and the other
+# heavier modules are imported inside the functions that need them, so
+# --help, the config commands and cached runs start quickly.
+
 
 # ============================================================
 # Configuration
@@ -52,264 +63,3088 @@ def load_config():
     return config
 
 
-def get_config_interactive(config):
-    """Interactively get missing configuration"""
-    if not config['url']:
-        config['url'] = input("Please enter Linkding service URL: ").strip()
-    if not config['token']:
-        config['token'] = input("Please enter Linkding API Token: ").strip()
-    return config
+def get_config_interactive(config):
+    """Interactively get missing configuration"""
+    if not config['url']:
+        config['url'] = input("Please enter Linkding service URL: ").strip()
+    if not config['token']:
+        config['token'] = input("Please enter Linkding API Token: ").strip()
+    return config
+
+
+# ============================================================
+# Instrumentation
+# ============================================================
+
+class LatencyHistogram:
+    """Fixed log-scale latency histogram (25% wide buckets from 0.1 ms to ~2 min)"""
+
+    BOUNDS_MS = tuple(round(0.1 * 1.25 ** k, 3) for k in range(64))
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.status_counts = {}
+
+    def add(self, latency_ms, status):
+        self.counts[bisect.bisect_left(self.BOUNDS_MS, latency_ms)] += 1
+        self.count += 1
+        self.total += latency_ms
+        self.max = max(self.max, latency_ms)
+        key = str(status) if status is not None else "error"
+        self.status_counts[key] = self.status_counts.get(key, 0) + 1
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of requests, in ms"""
+        target = fraction * self.count
+        seen = 0
+        for bound, count in zip(self.BOUNDS_MS, self.counts):
+            seen += count
+            if seen >= target:
+                return round(min(bound, self.max), 3)
+        return round(self.max, 3)
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 3) if self.count else None,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.max, 3),
+            "status_counts": dict(self.status_counts),
+            "buckets": [{"le_ms": bound, "count": count}
+                        for bound, count in zip(self.BOUNDS_MS + (None,), self.counts) if count],
+        }
+
+
+class Metrics:
+    """
+    Where the time of a run goes: per-phase time, per-endpoint latency
+    histograms, status codes and bytes on the wire
+
+    Phases are timed per thread and exclusively: entering a phase pauses
+    the enclosing one, so parse time spent inside a dedup loop is not
+    counted twice. With -j N, network time is the sum over all workers
+    and can exceed the wall time. Collection is off unless --stats or
+    --stats-json is given, so normal runs pay nothing.
+    """
+
+    # /api/bookmarks/123/ -> /api/bookmarks/{id}/
+    ID_SEGMENT = re.compile(r'/\d+(?=/|$)')
+
+    def __init__(self):
+        self.enabled = False
+        self.started = time.monotonic()
+        self.phases = {}
+        self.endpoints = {}
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.results = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _add_phase(self, name, seconds):
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @contextmanager
+    def _timed(self, name):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        now = time.perf_counter()
+        if stack:
+            outer = stack[-1]
+            self._add_phase(outer[0], now - outer[1])
+        stack.append([name, now])
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            name, started = stack.pop()
+            self._add_phase(name, now - started)
+            if stack:
+                stack[-1][1] = now
+
+    def phase(self, name):
+        """Context manager adding the time spent inside it to phase `name`"""
+        return self._timed(name) if self.enabled else nullcontext()
+
+    def timed_iter(self, name, iterable):
+        """Wrap an iterable so the time spent producing items counts as phase `name`"""
+        if not self.enabled:
+            return iterable
+        return self._timed_iter(name, iterable)
+
+    def _timed_iter(self, name, iterable):
+        iterator = iter(iterable)
+        while True:
+            with self._timed(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def record_request(self, method, path, status, latency):
+        """Record one HTTP attempt (every retry is an attempt of its own)"""
+        if not self.enabled:
+            return
+        endpoint = f"{method} {self.ID_SEGMENT.sub('/{id}', path.split('?', 1)[0])}"
+        with self._lock:
+            histogram = self.endpoints.get(endpoint)
+            if histogram is None:
+                histogram = self.endpoints[endpoint] = LatencyHistogram()
+            histogram.add(latency * 1000, status)
+
+    def add_bytes(self, sent, received):
+        """Count request and response body bytes"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.bytes_sent += sent
+            self.bytes_received += received
+
+    def to_dict(self):
+        status_counts = {}
+        for histogram in self.endpoints.values():
+            for status, count in histogram.status_counts.items():
+                status_counts[status] = status_counts.get(status, 0) + count
+        return {
+            "wall_time_s": round(time.monotonic() - self.started, 3),
+            "phases_s": {name: round(seconds, 3) for name, seconds in self.phases.items()},
+            "requests": sum(h.count for h in self.endpoints.values()),
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "status_counts": status_counts,
+            "endpoints": {name: h.to_dict() for name, h in sorted(self.endpoints.items())},
+            "results": dict(self.results),
+        }
+
+    def summary(self):
+        """Human readable report"""
+        data = self.to_dict()
+        lines = ["\nStatistics:", f"  Wall time: {data['wall_time_s']:.2f}s"]
+        if data["phases_s"]:
+            phases = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in data["phases_s"].items())
+            lines.append(f"  Phases (thread time): {phases}")
+        lines.append(f"  Requests: {data['requests']}, sent {format_bytes(data['bytes_sent'])}, "
+                     f"received {format_bytes(data['bytes_received'])}")
+        if data["status_counts"]:
+            statuses = ", ".join(f"{status} x{count}" for status, count in sorted(data["status_counts"].items()))
+            lines.append(f"  Status codes: {statuses}")
+        if data["endpoints"]:
+            lines.append(f"  {'Endpoint':<34}{'count':>8}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+            for name, h in data["endpoints"].items():
+                lines.append(f"  {name:<34}{h['count']:>8}" + "".join(
+                    f"{h[key]:>8.1f}ms" for key in ("p50_ms", "p95_ms", "p99_ms", "max_ms")))
+        return "\n".join(lines)
+
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+            f.write('\n')
+
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds // 3600}h{seconds // 60 % 60:02d}m"
+
+
+_metrics = Metrics()
+
+
+def get_metrics():
+    """Return the process-wide Metrics collector"""
+    return _metrics
+
+
+# ============================================================
+# HTTP Utilities
+# ============================================================
+
+class LinkdingSession:
+    """Keep-alive HTTP(S) connection pool shared by all API calls
+
+    Idle connections are kept per (scheme, host) and handed out again for
+    the next request, so a long import pays the TCP/TLS handshake once per
+    worker instead of once per bookmark. A single SSL context is reused for
+    every HTTPS connection.
+    """
+
+    def __init__(self, timeout=30):
+        import http.client
+        self._http = http.client
+        # Errors raised when the server has silently closed an idle keep-alive socket
+        self.stale_errors = (
+            ConnectionError,
+            http.client.BadStatusLine,
+            http.client.CannotSendRequest,
+            http.client.ResponseNotReady,
+        )
+        self.timeout = timeout
+        self.limiter = None
+        self.retry_policy = RetryPolicy()
+        self.retries = 0
+        self.gave_up = 0
+        self._ssl_context = None
+        self._idle = {}
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.reused = 0
+        # Set once the server accepted the token; the first request doubles as the auth check
+        self.authenticated = False
+
+    def _new_connection(self, scheme, netloc):
+        if scheme == 'https':
+            if self._ssl_context is None:
+                import ssl
+                self._ssl_context = ssl.create_default_context()
+            conn = self._http.HTTPSConnection(netloc, timeout=self.timeout, context=self._ssl_context)
+        else:
+            conn = self._http.HTTPConnection(netloc, timeout=self.timeout)
+        with get_metrics().phase('connect'):
+            # Connect here (not lazily in request) so TCP/TLS setup is measured on its own
+            conn.connect()
+        with self._lock:
+            self.opened += 1
+        return conn
+
+    def _acquire(self, key):
+        """Return (connection, reused) for the given (scheme, netloc)"""
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                self.reused += 1
+                return idle.pop(), True
+        return self._new_connection(*key), False
+
+    def _release(self, key, conn):
+        with self._lock:
+            self._idle.setdefault(key, []).append(conn)
+
+    def request(self, method, url, path, headers, body=None):
+        """Send a request over a pooled connection
+
+        Returns: (status, response_body, response_headers)
+        Raises the underlying exception if the request cannot be completed.
+        """
+        parsed = urlparse(url)
+        key = (parsed.scheme, parsed.netloc)
+        conn, reused = self._acquire(key)
+
+        while True:
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                raw = response.read()
+                response_body = raw.decode('utf-8')
+            except self.stale_errors:
+                conn.close()
+                if not reused:
+                    raise
+                # Server dropped the idle socket - retry once on a fresh connection
+                conn, reused = self._new_connection(*key), False
+                continue
+            except Exception:
+                conn.close()
+                raise
+
+            if response.will_close:
+                conn.close()
+            else:
+                self._release(key, conn)
+            get_metrics().add_bytes(len(body) if body else 0, len(raw))
+            return response.status, response_body, response.headers
+
+    def close(self):
+        """Close all idle connections"""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+    def count_retry(self, gave_up=False):
+        """Record one retry, or with gave_up=True a request that failed after retrying"""
+        with self._lock:
+            if gave_up:
+                self.gave_up += 1
+            else:
+                self.retries += 1
+
+    def summary(self):
+        """Human readable connection usage summary"""
+        text = f"Connections: opened {self.opened}, reused {self.reused}"
+        if self.retries:
+            text += f"\nRetries: {self.retries} (requests still failing after retries: {self.gave_up})"
+        return text
+
+
+class RateLimiter:
+    """Adaptive token bucket limiting the request rate to the server
+
+    Tokens are refilled at `rate` requests per second, capped at `max_rate`.
+    The rate follows AIMD: every healthy response adds a little throughput
+    (about `max_rate / 5` req/s per second), while a 429, a 5xx, a
+    connection error or latency rising well above the observed baseline
+    halves it. A Retry-After header pauses the bucket for the requested time.
+    """
+
+    def __init__(self, max_rate, min_rate=0.5):
+        self.max_rate = max_rate
+        self.min_rate = min(min_rate, max_rate)
+        self.rate = max(self.min_rate, max_rate / 4)
+        self.increase = max(1.0, max_rate / 5)
+        self.slowdowns = 0
+        self._tokens = 1.0
+        self._stamp = time.monotonic()
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._latency = None
+        self._baseline = None
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until the next request may be sent"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(1.0, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            wait = max(wait, self._paused_until - now)
+        if wait > 0:
+            with get_metrics().phase('sleep'):
+                time.sleep(wait)
+
+    def record(self, status, latency, retry_after=None):
+        """Feed the outcome of one request back into the rate"""
+        with self._lock:
+            now = time.monotonic()
+            congested = status is None or status == 429 or status >= 500
+            
+            if not congested:
+                if self._latency is None:
+                    self._latency = self._baseline = latency
+                else:
+                    self._latency += (latency - self._latency) * 0.2
+                    # Follow faster responses at once, slower ones only gradually
+                    if self._latency < self._baseline:
+                        self._baseline = self._latency
+                    else:
+                        self._baseline += (self._latency - self._baseline) * 0.01
+                    congested = (self._latency > 2 * self._baseline
+                                 and self._latency - self._baseline > 0.05)
+            
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+            
+            if congested:
+                # Cut at most once per second, a burst of errors is one signal
+                if now - self._last_decrease > max(self._latency or 0.0, 1.0):
+                    self.rate = max(self.min_rate, self.rate / 2)
+                    self._last_decrease = now
+                    self.slowdowns += 1
+            else:
+                self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+
+    def summary(self):
+        """Human readable rate limiter summary"""
+        return (f"Rate limit: ceiling {self.max_rate:g} req/s, final {self.rate:.1f} req/s, "
+                f"slowed down {self.slowdowns} times")
+
+
+class AuthenticationError(Exception):
+    """The server rejected the API token on the first request of a run"""
+
+    def __init__(self, status):
+        super().__init__(f"authentication failed (status code: {status})")
+        self.status = status
+
+
+def parse_retry_after(value):
+    """Parse a Retry-After header given in seconds, returns None if absent/unsupported"""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+# Responses worth retrying: the same request may succeed a moment later
+RETRYABLE_STATUS = frozenset({408, 429, 502, 503, 504})
+
+
+def is_retryable_error(error):
+    """Timeouts, connection resets/refusals and broken responses are transient"""
+    import http.client
+    import socket
+    import ssl
+    if isinstance(error, ssl.SSLCertVerificationError):
+        return False
+    # socket.timeout only became an alias of TimeoutError in Python 3.10
+    return isinstance(error, (TimeoutError, socket.timeout, ConnectionError, http.client.HTTPException, ssl.SSLError))
+
+
+def classify_result(status, error=None):
+    """
+    Classify the outcome of a request
+    Returns: 'ok', 'retryable' or 'permanent'
+    """
+    if status is None:
+        return 'retryable' if error is not None and is_retryable_error(error) else 'permanent'
+    if status < 400:
+        return 'ok'
+    return 'retryable' if status in RETRYABLE_STATUS else 'permanent'
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter for retryable failures"""
+
+    def __init__(self, retries=3, base_delay=0.5, max_delay=30.0):
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt, retry_after=None):
+        """Seconds to wait before retry number `attempt` (0-based)"""
+        import random
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        if retry_after is not None:
+            backoff = max(backoff, min(retry_after, self.max_delay))
+        return backoff
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Return the process-wide LinkdingSession, creating it on first use"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = LinkdingSession()
+    return _session
+
+
+def make_request(method, path, config, data=None):
+    """
+    Send HTTP request
+    Retryable failures are retried according to the session's RetryPolicy.
+    Returns: (status, body), status is None if no response was received
+    """
+    headers = {
+        "Authorization": f"Token {config['token']}",
+        "Content-Type": "application/json"
+    }
+
+    body = json.dumps(data).encode('utf-8') if data else None
+
+    session = get_session()
+    metrics = get_metrics()
+    limiter = session.limiter
+    policy = session.retry_policy
+    attempt = 0
+    
+    while True:
+        if limiter:
+            limiter.acquire()
+        
+        start = time.monotonic()
+        error = None
+        retry_after = None
+        try:
+            with metrics.phase('network'):
+                status, response_body, response_headers = session.request(method, config['url'], path, headers, body)
+        except Exception as e:
+            status, response_body, error = None, str(e), e
+        latency = time.monotonic() - start
+        metrics.record_request(method, path, status, latency)
+        
+        if not session.authenticated and status is not None:
+            if status in (401, 403):
+                raise AuthenticationError(status)
+            if status < 500:
+                session.authenticated = True
+        
+        if status in (429, 503):
+            retry_after = parse_retry_after(response_headers.get('Retry-After'))
+        if limiter:
+            limiter.record(status, latency, retry_after)
+        
+        if classify_result(status, error) != 'retryable':
+            return status, response_body
+        if attempt >= policy.retries:
+            if attempt:
+                session.count_retry(gave_up=True)
+            return status, response_body
+        
+        with metrics.phase('sleep'):
+            time.sleep(policy.delay(attempt, retry_after))
+        attempt += 1
+        session.count_retry()
+
+
+def test_connection(config):
+    """Test API connection"""
+    try:
+        status, body = make_request("GET", "/api/bookmarks/?limit=1", config)
+    except AuthenticationError as e:
+        return False, e.status
+    return status == 200, status
+
+
+# A successful connection test is trusted for this long (seconds)
+PREFLIGHT_TTL = 600
+
+
+def _preflight_path():
+    return get_cache_dir() / 'preflight.json'
+
+
+def _load_preflight():
+    try:
+        with open(_preflight_path(), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_preflight(config, ok=True):
+    """Remember (or with ok=False forget) that the server accepted this URL and token"""
+    data = _load_preflight()
+    key = server_cache_key(config)
+    if ok:
+        data[key] = time.time()
+    elif data.pop(key, None) is None:
+        return
+    
+    now = time.time()
+    data = {k: v for k, v in data.items() if isinstance(v, (int, float)) and now - v < PREFLIGHT_TTL}
+    try:
+        path = _preflight_path()
+        tmp = path.with_suffix('.tmp')
+        tmp.write_text(json.dumps(data), encoding='utf-8')
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def preflight(config, args):
+    """
+    Connection test before a command, skipped with --no-preflight or when
+    the same URL and token passed within PREFLIGHT_TTL. Without the test,
+    the command's first request acts as the auth check instead.
+    Returns: (success, status)
+    """
+    if getattr(args, 'no_preflight', False):
+        return True, None
+    
+    checked = _load_preflight().get(server_cache_key(config))
+    if isinstance(checked, (int, float)) and 0 <= time.time() - checked < PREFLIGHT_TTL:
+        return True, None
+    
+    success, status = test_connection(config)
+    if success:
+        save_preflight(config)
+    return success, status
+
+
+def create_bookmark(url, tag_names, config, fields=None):
+    """Create a bookmark (fields: further BOOKMARK_FIELDS values, e.g. from an export)"""
+    data = {
+        "url": url,
+        "tag_names": tag_names
+    }
+    if fields:
+        data.update(fields)
+    
+    status, body = make_request("POST", "/api/bookmarks/", config, data)
+    
+    if status in [200, 201]:
+        return True, status, None
+    else:
+        return False, status, body
+
+
+def find_bookmark(url, config):
+    """
+    Look up the bookmark of an exact URL with the check endpoint
+    Returns: (bookmark_id, tag_names) or None if the URL is not bookmarked
+    Raises: RuntimeError if the server could not be asked
+    """
+    status, body = make_request("GET", f"/api/bookmarks/check/?url={quote(url, safe='')}", config)
+    if status != 200:
+        raise RuntimeError(f"{status} - {body}")
+    bookmark = json.loads(body).get("bookmark")
+    if not bookmark:
+        return None
+    return bookmark["id"], bookmark.get("tag_names", [])
+
+
+# ============================================================
+# Bookmark Records
+# ============================================================
+
+class TagTable:
+    """
+    Interned tag names and tag paths shared by all bookmark records
+
+    Each distinct tag name is stored once and referred to by a small
+    integer id. A record's tags are a tuple of ids (a "path", e.g. the
+    folders above a bookmark) and every distinct path is stored once, so a
+    million bookmarks from a few hundred folders share a few hundred tuples.
+    """
+
+    def __init__(self):
+        self.names = []
+        self._ids = {}
+        self._paths = {}        # tuple of ids -> the same, shared tuple
+        self._interned = {}     # tuple of ids -> shared tuple of names
+        self._lock = threading.Lock()
+
+    def tag_id(self, name):
+        """Id of a tag name, assigned on first use"""
+        tag_id = self._ids.get(name)
+        if tag_id is None:
+            with self._lock:
+                tag_id = self._ids.get(name)
+                if tag_id is None:
+                    tag_id = len(self.names)
+                    self.names.append(name)
+                    self._ids[name] = tag_id
+        return tag_id
+
+    def path(self, tags):
+        """Shared tuple of tag ids for a sequence of tag names"""
+        ids = self._ids
+        return self.intern_ids(tuple([ids.get(name) or self.tag_id(name) for name in tags]))
+
+    def intern_ids(self, ids):
+        """Shared instance of a tuple of tag ids"""
+        return self._paths.setdefault(ids, ids)
+
+    def resolve(self, path):
+        """Tuple of tag names for a tuple of tag ids"""
+        names = self.names
+        return tuple([names[i] for i in path])
+
+    def shared_names(self, path):
+        """Like resolve, but returns the same tuple for every call with an equal path"""
+        names = self._interned.get(path)
+        if names is None:
+            names = self._interned.setdefault(path, self.resolve(path))
+        return names
+
+    def intern(self, tags):
+        """Shared tuple of tag names equal to tags"""
+        return self.shared_names(self.path(tags))
+
+
+_tag_table = TagTable()
+
+
+def get_tag_table():
+    """Return the process-wide TagTable"""
+    return _tag_table
+
+
+# Bookmark fields besides url and tag_names that a JSONL export carries
+# back to the server, with their types; only non-default values are kept
+BOOKMARK_FIELDS = {
+    "title": str,
+    "description": str,
+    "notes": str,
+    "is_archived": bool,
+    "unread": bool,
+    "shared": bool,
+}
+
+
+class Bookmark:
+    """
+    A link to upload: its URL and the interned tag path it belongs to
+
+    Unpacks like the (url, tags) pairs used throughout the upload code,
+    with tags resolved to a shared tuple of names. fields holds the
+    BOOKMARK_FIELDS values read from an export, or None.
+    """
+
+    __slots__ = ('url', 'tag_ids', 'fields')
+
+    def __init__(self, url, tag_ids=(), fields=None):
+        self.url = url
+        self.tag_ids = tag_ids
+        self.fields = fields
+
+    @classmethod
+    def from_tags(cls, url, tags, fields=None):
+        return cls(url, _tag_table.path(tags), fields)
+
+    @property
+    def tags(self):
+        return _tag_table.resolve(self.tag_ids)
+
+    def __iter__(self):
+        yield self.url
+        yield _tag_table.resolve(self.tag_ids)
+
+    def __eq__(self, other):
+        if not isinstance(other, Bookmark):
+            return NotImplemented
+        return self.url == other.url and self.tag_ids == other.tag_ids and self.fields == other.fields
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Bookmark({self.url!r}, {self.tags!r})"
+
+
+# ============================================================
+# URL Canonicalization
+# ============================================================
+
+DEFAULT_PORTS = {'http': '80', 'https': '443'}
+
+# Query parameters that only carry click/campaign tracking information
+TRACKING_PARAMS = frozenset({
+    'fbclid', 'gclid', 'dclid', 'gbraid', 'wbraid', 'msclkid', 'yclid', 'twclid',
+    'igshid', 'mc_cid', 'mc_eid', '_hsenc', '_hsmi', 'mkt_tok', 'ref_src', 'spm',
+})
+TRACKING_PREFIXES = ('utm_',)
+
+
+def split_url(url):
+    """
+    Split an absolute URL into its scheme, netloc and the remainder
+    Returns: (scheme, netloc, rest), scheme is '' if url is not absolute
+    """
+    scheme, sep, remainder = url.partition('://')
+    if not sep or not scheme or not scheme[0].isalpha():
+        return '', '', url
+    
+    end = len(remainder)
+    for delimiter in '/?#':
+        pos = remainder.find(delimiter)
+        if pos != -1 and pos < end:
+            end = pos
+    return scheme, remainder[:end], remainder[end:]
+
+
+@lru_cache(maxsize=4096)
+def canonical_netloc(scheme, netloc):
+    """
+    Lower-case the host and drop the scheme's default port
+    Returns: normalized netloc, or '' if it has no valid host
+    """
+    userinfo, at, hostport = netloc.rpartition('@')
+    
+    if hostport.startswith('['):
+        # IPv6 literal
+        end = hostport.find(']')
+        if end == -1:
+            return ''
+        host, rest = hostport[:end + 1], hostport[end + 1:]
+        if rest and not rest.startswith(':'):
+            return ''
+        port = rest[1:]
+    else:
+        host, _, port = hostport.partition(':')
+    
+    if not host or (port and not port.isdigit()):
+        return ''
+    if port == DEFAULT_PORTS.get(scheme):
+        port = ''
+    
+    return userinfo + at + host.lower() + (f':{port}' if port else '')
+
+
+def _is_tracking_param(param):
+    key = param.partition('=')[0].lower()
+    return key in TRACKING_PARAMS or key.startswith(TRACKING_PREFIXES)
+
+
+def canonicalize_url(url):
+    """
+    Normalize a URL so that trivially different spellings compare equal
+
+    Lower-cases scheme and host, drops default ports, trailing slashes
+    (an empty path becomes '/'), tracking query parameters and fragments
+    (except client-side routes such as '#!/page' or '#/page').
+    Returns: canonical URL, or None if url is not a valid absolute URL
+    """
+    scheme, netloc, rest = split_url(url)
+    scheme = scheme.lower()
+    netloc = canonical_netloc(scheme, netloc) if scheme else ''
+    if not netloc:
+        return None
+    
+    rest, _, fragment = rest.partition('#')
+    path, _, query = rest.partition('?')
+    
+    path = path.rstrip('/') or '/'
+    if query:
+        query = '&'.join(p for p in query.split('&') if p and not _is_tracking_param(p))
+    
+    canonical = f"{scheme}://{netloc}{path}"
+    if query:
+        canonical += f"?{query}"
+    if fragment.startswith(('!', '/')):
+        canonical += f"#{fragment}"
+    return canonical
+
+
+def url_key(url):
+    """Key under which URLs are compared: the canonical form, or url itself if it has none"""
+    return canonicalize_url(url) or url
+
+
+def dedupe_links(links, canonicalize=True):
+    """
+    Merge links pointing to the same URL, unioning their tags in first-seen order
+
+    URLs are compared by their canonical form (exactly with canonicalize=False),
+    but each merged bookmark keeps the URL as first written in the source.
+    Returns: ([Bookmark, ...], merged_count, invalid_count)
+    """
+    table = get_tag_table()
+    merged = {}
+    duplicates = 0
+    invalid = 0
+    
+    for link in links:
+        url = link.url
+        if not isinstance(url, str):
+            invalid += 1
+            continue
+        
+        key = canonicalize_url(url) if canonicalize else (url if is_valid_url(url) else None)
+        if key is None:
+            invalid += 1
+            continue
+        
+        existing = merged.get(key)
+        if existing is None:
+            merged[key] = link
+        else:
+            duplicates += 1
+            added = tuple(t for t in link.tag_ids if t not in existing.tag_ids)
+            if added:
+                merged[key] = Bookmark(existing.url, table.intern_ids(existing.tag_ids + added), existing.fields)
+    
+    return list(merged.values()), duplicates, invalid
+
+
+def validate_stream(links, canonicalize=True, counts=None):
+    """
+    Lazily drop Bookmark records with invalid URLs, without merging duplicates
+    URLs are passed on as written; invalid ones are counted in counts['invalid'].
+    """
+    for link in links:
+        url = link.url
+        if isinstance(url, str) and (canonicalize_url(url) if canonicalize else is_valid_url(url)):
+            yield link
+        elif counts is not None:
+            counts['invalid'] = counts.get('invalid', 0) + 1
+
+
+def print_dedupe_summary(duplicates, invalid):
+    """Report what the dedup stage removed"""
+    if duplicates:
+        print(f"Merged {duplicates} duplicate links")
+    if invalid:
+        print(f"Ignored {invalid} invalid URLs")
+
+
+# ============================================================
+# Input Files
+# ============================================================
+
+def open_input(path):
+    """Open a file for binary reading, decompressing .gz files transparently"""
+    if str(path).endswith('.gz'):
+        import gzip
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+
+@contextmanager
+def mapped_input(f):
+    """
+    Read-only memory map of a binary file, or f itself when it cannot be
+    mapped (empty files, pipes, in-memory and compressed streams)
+
+    Both support readline() and read(); a map can also be scanned by byte
+    patterns in place, so only the matched spans are ever copied.
+    """
+    if not isinstance(f, (io.BufferedReader, io.FileIO)):
+        yield f
+        return
+    import mmap
+    try:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        yield f
+        return
+    try:
+        yield mapped
+    finally:
+        try:
+            mapped.close()
+        except BufferError:
+            # A scanner abandoned mid-way still holds the buffer; the map
+            # is released together with it
+            pass
+
+
+# ============================================================
+# Markdown Parsing
+# ============================================================
+
+def is_valid_url(url):
+    """Check if it is a valid URL"""
+    scheme, netloc, _ = split_url(url)
+    return bool(scheme) and bool(canonical_netloc(scheme.lower(), netloc))
+
+
+MD_LIST_ITEM = re.compile(r'^(\s*)([-*+]|\d+\.)\s+(.+)$')
+MD_LINK_START = re.compile(r'\[([^\]]*)\]\(https?://')
+MD_LINK = re.compile(r'\[([^\]]*)\]\((https?://[^\)]+)\)')
+MD_URL_START = re.compile(r'https?://')
+MD_PLAIN_URL = re.compile(r'https?://[^\s\)]+')
+MD_BOLD = re.compile(r'\*\*(.+?)\*\*')
+MD_LINK_TEXT = re.compile(r'\[([^\]]+)\]\([^\)]+\)')
+URL_TRAILING_PUNCTUATION = ',;。，；'
+
+
+def iter_markdown_links(lines, base_tag):
+    """
+    Extract links from Markdown lines in a single pass
+    base_tag is a tag name or a sequence of tag names put before the section tags.
+    Yields: Bookmark records sharing one interned tag path per section
+    """
+    table = get_tag_table()
+    if isinstance(base_tag, str):
+        base = (base_tag,) if base_tag else ()
+    else:
+        base = tuple(base_tag or ())
+    sections = []
+    tags = table.path(base)
+    
+    for line in lines:
+        has_url = '://' in line
+        list_match = MD_LIST_ITEM.match(line)
+        
+        if list_match:
+            content_text = list_match.group(3).strip()
+            
+            if has_url and '](http' in content_text and MD_LINK_START.search(content_text):
+                for text, url in MD_LINK.findall(content_text):
+                    url = url.rstrip(URL_TRAILING_PUNCTUATION)
+                    if is_valid_url(url):
+                        yield Bookmark(url, tags)
+            elif has_url and MD_URL_START.search(content_text):
+                for url in MD_PLAIN_URL.findall(content_text):
+                    url = url.rstrip(URL_TRAILING_PUNCTUATION)
+                    if is_valid_url(url):
+                        yield Bookmark(url, tags)
+            else:
+                # Plain title - starts a new section at this nesting level
+                if '**' in content_text:
+                    content_text = MD_BOLD.sub(r'\1', content_text)
+                if '](' in content_text:
+                    content_text = MD_LINK_TEXT.sub(r'\1', content_text)
+                
+                indent = list_match.group(1)
+                level = len(indent) // 2 if indent else 0
+                if level < len(sections):
+                    del sections[level:]
+                sections.append(content_text)
+                tags = table.path(base + tuple(sections))
+        
+        elif has_url:
+            # Non-list item, check plain URL
+            for url in MD_PLAIN_URL.findall(line):
+                url = url.rstrip(URL_TRAILING_PUNCTUATION)
+                if is_valid_url(url):
+                    yield Bookmark(url, tags)
+
+
+def extract_links_from_markdown(content, base_tag):
+    """
+    Extract links and corresponding tags from Markdown content
+    Returns: [Bookmark, ...]
+    """
+    return list(iter_markdown_links(content.split('\n'), base_tag))
+
+
+# Lines that may be list items, also with non-ASCII (Unicode space) indentation
+MD_LIST_CANDIDATE = re.compile(rb'[\s\x80-\xff]*(?:[-*+]|\d+\.)')
+
+
+def iter_markdown_lines(source):
+    """
+    Decoded lines of a binary Markdown source (file object or mapped_input)
+    Lines are split as bytes and only decoded when they contain a URL or
+    may be a list item; other lines cannot change the extracted links.
+    Raises UnicodeDecodeError if a decoded line is not valid UTF-8.
+    """
+    for raw in iter(source.readline, b''):
+        if b'://' in raw or MD_LIST_CANDIDATE.match(raw):
+            line = raw.decode('utf-8')
+            if line.endswith('\n'):
+                line = line[:-2] if line.endswith('\r\n') else line[:-1]
+            yield line
+
+
+def extract_links_from_markdown_file(path, base_tag):
+    """
+    Extract links from a Markdown file without holding its text
+    The file is memory-mapped and scanned line by line, so memory use
+    follows the number of links rather than the size of the file.
+    Returns: [Bookmark, ...]
+    """
+    with open(path, 'rb') as f, mapped_input(f) as source:
+        return list(iter_markdown_links(iter_markdown_lines(source), base_tag))
+
+
+MARKDOWN_SUFFIXES = ('.md', '.markdown')
+
+
+def iter_markdown_files(root):
+    """Markdown files below root in sorted order, skipping hidden files and directories"""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith('.'))
+        for name in sorted(filenames):
+            if not name.startswith('.') and name.lower().endswith(MARKDOWN_SUFFIXES):
+                yield Path(dirpath) / name
+
+
+def markdown_base_tags(path, root, prefix=None):
+    """Base tags of a file in a directory import: [prefix,] directories..., file name"""
+    relative = path.relative_to(root)
+    tags = (prefix,) if prefix else ()
+    return tags + relative.parent.parts + (path.stem,)
+
+
+def parse_markdown_file(job):
+    """
+    Process pool worker of a directory import
+    job: (path, base_tags, previous_hash)
+    Returns: (hash, [(url, tags), ...] or None if the hash is unchanged, error or None)
+    """
+    import hashlib
+    path, base_tags, previous = job
+    try:
+        with open(path, 'rb') as f, mapped_input(f) as source:
+            # The base tags are part of the hash: moving a file changes its links' tags
+            digest = hashlib.sha1('\0'.join(base_tags).encode('utf-8') + b'\0')
+            digest.update(source if source is not f else f.read())
+            digest = digest.hexdigest()
+            if digest == previous:
+                return digest, None, None
+            
+            source.seek(0)
+            links = list(iter_markdown_links(iter_markdown_lines(source), base_tags))
+    except OSError as e:
+        return None, None, str(e)
+    except UnicodeDecodeError:
+        return None, None, "not valid UTF-8"
+    
+    # Plain tuples pickle cheaply back to the parent, tag ids are per process
+    table = get_tag_table()
+    return digest, [(link.url, table.shared_names(link.tag_ids)) for link in links], None
+
+
+class FileHashes:
+    """Content hashes of the files of a directory import, used to skip unchanged files"""
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.previous = data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            self.previous = {}
+        self.current = {}
+
+    def save(self):
+        """Replace the stored hashes with the ones of this run"""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix('.tmp')
+            tmp.write_text(json.dumps(self.current), encoding='utf-8')
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Warning: Failed to save file hashes - {e}")
+
+
+def read_markdown_directory(root, config, args):
+    """
+    Extract the links of every Markdown file below root, parsing on a process pool
+    Files whose content (and base tags) did not change since the last
+    successful run are skipped, except with --sync or --rescan.
+    Returns: ([Bookmark, ...], FileHashes)
+    """
+    hashes = FileHashes(get_cache_dir() / 'markdown' / f"{server_cache_key(config)}-{source_key(args)}.json")
+    rescan = args.rescan or args.sync
+    jobs = []
+    for path in iter_markdown_files(root):
+        relative = path.relative_to(root).as_posix()
+        base_tags = markdown_base_tags(path, root, args.tag)
+        jobs.append((str(path), base_tags, None if rescan else hashes.previous.get(relative)))
+    
+    workers = max(1, min(args.workers or os.cpu_count() or 1, len(jobs)))
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(max_workers=workers)
+        results = executor.map(parse_markdown_file, jobs, chunksize=max(1, len(jobs) // (workers * 8)))
+    else:
+        executor = None
+        results = map(parse_markdown_file, jobs)
+    
+    links = []
+    counts = {"parsed": 0, "unchanged": 0, "failed": 0}
+    try:
+        for (path, _, _), (digest, file_links, error) in zip(jobs, results):
+            relative = Path(path).relative_to(root).as_posix()
+            if error is not None:
+                counts["failed"] += 1
+                print(f"  ✗ {relative}: {error}")
+                continue
+            hashes.current[relative] = digest
+            if file_links is None:
+                counts["unchanged"] += 1
+                continue
+            counts["parsed"] += 1
+            links.extend(Bookmark.from_tags(url, tags) for url, tags in file_links)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    
+    print(f"Scanned {len(jobs)} Markdown files: {counts['parsed']} parsed, "
+          f"{counts['unchanged']} unchanged, {counts['failed']} unreadable")
+    return links, hashes
+
+
+# ============================================================
+# JSONL Parsing
+# ============================================================
+
+class JsonlReader:
+    """
+    Stream Bookmark records from a JSONL file (or .jsonl.gz) one line at a time
+
+    Lines that are not valid UTF-8 JSON objects with a string "url" and a
+    list "tag_names" are counted as malformed instead of being dropped
+    silently; the first few are kept in `errors` for reporting. The
+    BOOKMARK_FIELDS of an export (title, archived state, ...) are kept.
+    """
+
+    MAX_ERRORS = 5
+
+    def __init__(self, path):
+        self.path = path
+        self.lines = 0
+        self.malformed = 0
+        self.errors = []
+
+    def _malformed(self, lineno, reason):
+        self.malformed += 1
+        if len(self.errors) < self.MAX_ERRORS:
+            self.errors.append((lineno, reason))
+
+    def __iter__(self):
+        with open_input(self.path) as f:
+            for lineno, raw in enumerate(f, 1):
+                self.lines = lineno
+                line = raw.strip()
+                if not line:
+                    continue
+                
+                try:
+                    data = json.loads(line.decode('utf-8'))
+                except UnicodeDecodeError:
+                    self._malformed(lineno, "not valid UTF-8")
+                    continue
+                except json.JSONDecodeError as e:
+                    self._malformed(lineno, f"invalid JSON ({e.msg})")
+                    continue
+                
+                if not isinstance(data, dict):
+                    self._malformed(lineno, "not a JSON object")
+                    continue
+                
+                url = data.get("url", "")
+                tag_names = data.get("tag_names", [])
+                if not url or not isinstance(url, str):
+                    self._malformed(lineno, 'missing "url"')
+                elif not isinstance(tag_names, list) or not all(isinstance(t, str) for t in tag_names):
+                    self._malformed(lineno, '"tag_names" is not a list of strings')
+                else:
+                    fields = {name: data[name] for name, kind in BOOKMARK_FIELDS.items()
+                              if data.get(name) and isinstance(data[name], kind)}
+                    yield Bookmark.from_tags(url, tag_names, fields or None)
+
+    def print_summary(self):
+        """Report malformed lines, if any"""
+        if not self.malformed:
+            return
+        print(f"Ignored {self.malformed} malformed lines:")
+        for lineno, reason in self.errors:
+            print(f"  line {lineno}: {reason}")
+        if self.malformed > len(self.errors):
+            print(f"  ... and {self.malformed - len(self.errors)} more")
+
+
+def count_lines(path, chunk_size=1 << 20):
+    """Count newline-terminated lines without decoding or holding the file"""
+    count = 0
+    with open_input(path) as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            count += chunk.count(b'\n')
+    return count
+
+
+# ============================================================
+# Chrome Bookmarks Parsing
+# ============================================================
+
+NETSCAPE_TOKEN = re.compile(
+    rb'<(?:(DL)\b[^>]*>|(/DL)\s*>|H3\b[^>]*>(.*?)</H3\s*>|A\b([^>]*)>(.*?)</A\s*>)',
+    re.IGNORECASE | re.DOTALL
+)
+NETSCAPE_HREF = re.compile(rb'\bHREF\s*=\s*"([^"]*)"', re.IGNORECASE)
+NETSCAPE_ADD_DATE = re.compile(rb'\bADD_DATE\s*=\s*"(\d+)"', re.IGNORECASE)
+NETSCAPE_TAGS = re.compile(rb'\bTAGS\s*=\s*"([^"]*)"', re.IGNORECASE)
+
+
+def _decode_html(raw):
+    text = raw.decode('utf-8', errors='replace')
+    if '&' not in text:
+        return text
+    import html
+    return html.unescape(text)
+
+
+def iter_netscape_tokens(f, chunk_size=1 << 20):
+    """NETSCAPE_TOKEN matches of a binary stream read in chunks"""
+    buffer = b''
+    while True:
+        chunk = f.read(chunk_size)
+        buffer += chunk
+        last_end = 0
+        
+        for match in NETSCAPE_TOKEN.finditer(buffer):
+            last_end = match.end()
+            yield match
+        
+        if not chunk:
+            break
+        
+        # Keep only the unfinished token at the end of the buffer
+        start = buffer.find(b'<', last_end)
+        buffer = buffer[start:] if start != -1 else b''
+
+
+def iter_netscape_bookmarks(f, chunk_size=1 << 20):
+    """
+    Stream bookmarks from a Netscape bookmark file (Chrome/Firefox/Edge HTML export)
+
+    The binary file is memory-mapped (or read in chunks if it cannot be)
+    and tokenized on <DL>, </DL>, <H3> and <A> tags as bytes, so only the
+    matched URLs, titles and folder names are decoded. Folder depth follows
+    the real list nesting and does not depend on indentation or line
+    breaks. Tags from a TAGS attribute (Firefox, Linkding and Pinboard
+    exports) follow the folders.
+    Yields: {'url': ..., 'tags': (folder, ..., tag, ...), 'title': ..., 'add_date': int or None}
+    """
+    folder_stack = []       # one entry per open <DL>, None for lists without a folder
+    path = ()               # names of the enclosing folders, shared between bookmarks
+    pending_folder = None   # folder name waiting for its <DL>
+    
+    with mapped_input(f) as source:
+        tokens = NETSCAPE_TOKEN.finditer(source) if source is not f else iter_netscape_tokens(f, chunk_size)
+        
+        for match in tokens:
+            kind = match.lastindex
+            
+            if kind == 5:
+                # <A HREF="...">title</A>
+                attrs = match.group(4)
+                href = NETSCAPE_HREF.search(attrs)
+                if not href:
+                    continue
+                url = _decode_html(href.group(1))
+                if not url.startswith(('http://', 'https://')):
+                    continue
+                add_date = NETSCAPE_ADD_DATE.search(attrs)
+                tags = path
+                tag_attr = NETSCAPE_TAGS.search(attrs)
+                if tag_attr and tag_attr.group(1).strip():
+                    extra = (t.strip() for t in _decode_html(tag_attr.group(1)).split(','))
+                    tags = get_tag_table().intern(dict.fromkeys(path + tuple(t for t in extra if t)))
+                yield {
+                    'url': url,
+                    'tags': tags,
+                    'title': _decode_html(match.group(5)).strip(),
+                    'add_date': int(add_date.group(1)) if add_date else None,
+                }
+            
+            elif kind == 3:
+                # <H3>folder</H3>, its contents follow in the next <DL>
+                pending_folder = _decode_html(match.group(3)).strip() or None
+            
+            elif kind == 1:
+                folder_stack.append(pending_folder)
+                if pending_folder:
+                    path = path + (pending_folder,)
+                pending_folder = None
+            
+            else:
+                if folder_stack and folder_stack.pop():
+                    path = path[:-1]
+                pending_folder = None
+
+
+# Chrome stores times as microseconds since 1601-01-01
+CHROME_EPOCH_OFFSET = 11644473600
+# Chrome bookmark nodes smaller than this are decoded at once with json.loads
+CHROME_NODE_LOAD = 1 << 16
+
+JSON_WS = re.compile(rb'[ \t\r\n]*')
+JSON_STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+JSON_SCALAR = re.compile(rb'-?[0-9][0-9.eE+-]*|true|false|null')
+# Everything up to the next bracket that is not inside a string
+JSON_SKIP = re.compile(rb'[^"\[\]{}]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"\[\]{}]*)*', re.DOTALL)
+
+
+class JsonScanner:
+    """
+    Pull scanner over a JSON document held in bytes or a memory map
+
+    Values are read in place at the cursor (`pos`): strings are decoded
+    on demand and everything else can be skipped without building Python
+    objects, so a large document is walked without materializing it.
+    Raises ValueError on malformed input.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.pos = 0
+
+    def error(self, expected):
+        return ValueError(f"invalid JSON at byte {self.pos}: expected {expected}")
+
+    def peek(self):
+        """Next non-whitespace byte (b'' at the end), without consuming it"""
+        self.pos = JSON_WS.match(self.source, self.pos).end()
+        return self.source[self.pos:self.pos + 1]
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise self.error(repr(char.decode()))
+        self.pos += 1
+
+    def string(self):
+        self.peek()
+        match = JSON_STRING.match(self.source, self.pos)
+        if not match:
+            raise self.error("a string")
+        self.pos = match.end()
+        raw = match.group()
+        if b'\\' in raw:
+            return json.loads(raw)
+        return raw[1:-1].decode('utf-8', errors='replace')
+
+    def skip(self, limit=None):
+        """
+        Move the cursor past the value at the cursor
+
+        With a limit, give up on objects and arrays longer than `limit`
+        bytes and leave the cursor where it was.
+        Returns: True if the value was skipped
+        """
+        char = self.peek()
+        if char == b'"':
+            self.string()
+        elif char in (b'{', b'['):
+            depth = 0
+            pos = self.pos
+            while True:
+                char = self.source[pos:pos + 1]
+                if char in (b'{', b'['):
+                    depth += 1
+                elif char in (b'}', b']'):
+                    depth -= 1
+                    if not depth:
+                        break
+                else:
+                    self.pos = pos
+                    raise self.error("'}' or ']'")
+                pos = JSON_SKIP.match(self.source, pos + 1).end()
+                if limit is not None and pos - self.pos > limit:
+                    return False
+            self.pos = pos + 1
+        else:
+            match = JSON_SCALAR.match(self.source, self.pos)
+            if not match:
+                raise self.error("a value")
+            self.pos = match.end()
+        return True
+
+    def members(self):
+        """
+        Keys of the object at the cursor
+
+        After each key the cursor is on its value, which the caller must
+        consume (or skip) before asking for the next key.
+        """
+        self.expect(b'{')
+        if self.peek() == b'}':
+            self.pos += 1
+            return
+        while True:
+            key = self.string()
+            self.expect(b':')
+            yield key
+            char = self.peek()
+            self.pos += 1
+            if char == b'}':
+                return
+            if char != b',':
+                self.pos -= 1
+                raise self.error("',' or '}'")
+
+    def elements(self):
+        """Like members() for the array at the cursor, yielding indexes"""
+        self.expect(b'[')
+        if self.peek() == b']':
+            self.pos += 1
+            return
+        index = 0
+        while True:
+            yield index
+            char = self.peek()
+            self.pos += 1
+            if char == b']':
+                return
+            if char != b',':
+                self.pos -= 1
+                raise self.error("',' or ']'")
+            index += 1
+
+
+def _chrome_field(node, key):
+    value = node.get(key)
+    return value if isinstance(value, str) else ''
+
+
+def _chrome_bookmark(node, path):
+    """Bookmark dict for a Chrome url node, None for other URL schemes"""
+    url = _chrome_field(node, 'url')
+    if not url.startswith(('http://', 'https://')):
+        return None
+    added = _chrome_field(node, 'date_added')
+    return {
+        'url': url,
+        'tags': path,
+        'title': _chrome_field(node, 'name').strip(),
+        'add_date': int(added) // 1000000 - CHROME_EPOCH_OFFSET if added.isdigit() and int(added) else None,
+    }
+
+
+def _chrome_folder_path(node, path):
+    name = _chrome_field(node, 'name').strip()
+    return path + (name,) if name else path
+
+
+def _chrome_tree(node, path):
+    """Bookmarks of a decoded Chrome bookmark node"""
+    if not isinstance(node, dict):
+        return
+    if node.get('type') == 'url':
+        bookmark = _chrome_bookmark(node, path)
+        if bookmark:
+            yield bookmark
+    elif isinstance(node.get('children'), list):
+        folder = _chrome_folder_path(node, path)
+        for child in node['children']:
+            yield from _chrome_tree(child, folder)
+
+
+def _chrome_node(scanner, path):
+    """Bookmarks of the Chrome bookmark node (url or folder) at the cursor"""
+    start = scanner.pos
+    if scanner.skip(CHROME_NODE_LOAD):
+        yield from _chrome_tree(json.loads(scanner.source[start:scanner.pos]), path)
+        return
+    
+    # A large folder: walk it in place
+    fields = {}
+    children = None
+    for key in scanner.members():
+        if key == 'children' and scanner.peek() == b'[':
+            # Chrome writes "children" before "name": remember where the
+            # list starts and walk it once the folder name is known
+            children = scanner.pos
+            scanner.skip()
+        elif key in ('name', 'type', 'url', 'date_added') and scanner.peek() == b'"':
+            fields[key] = scanner.string()
+        else:
+            scanner.skip()
+    
+    if fields.get('type') == 'url':
+        bookmark = _chrome_bookmark(fields, path)
+        if bookmark:
+            yield bookmark
+    elif children is not None:
+        end = scanner.pos
+        scanner.pos = children
+        folder = _chrome_folder_path(fields, path)
+        for _ in scanner.elements():
+            if scanner.peek() == b'{':
+                yield from _chrome_node(scanner, folder)
+            else:
+                scanner.skip()
+        scanner.pos = end
+
+
+def is_chrome_json(f):
+    """True if the buffered binary stream f holds Chrome's JSON Bookmarks file rather than HTML"""
+    return f.peek(64)[:64].lstrip().startswith(b'{')
+
+
+def iter_chrome_json_bookmarks(f):
+    """
+    Stream bookmarks from Chrome's JSON profile file (<profile>/Bookmarks, also used by Edge)
+
+    The file is memory-mapped and its "roots" tree walked with JsonScanner:
+    folders are followed in place and only nodes smaller than
+    CHROME_NODE_LOAD are decoded as a whole, so memory use does not grow
+    with the file. The root folders ("Bookmarks bar", "Other bookmarks",
+    ...) and their subfolders become tags like in the HTML export.
+    Yields: {'url': ..., 'tags': (folder, ...), 'title': ..., 'add_date': int or None}
+    """
+    with mapped_input(f) as source:
+        scanner = JsonScanner(f.read() if source is f else source)
+        for key in scanner.members():
+            if key != 'roots' or scanner.peek() != b'{':
+                scanner.skip()
+                continue
+            for _ in scanner.members():
+                if scanner.peek() == b'{':
+                    yield from _chrome_node(scanner, ())
+                else:
+                    scanner.skip()
+
+
+def parse_chrome_bookmarks(html_content):
+    """Parse Chrome bookmarks HTML file"""
+    return list(iter_netscape_bookmarks(io.BytesIO(html_content.encode('utf-8'))))
+
+
+# ============================================================
+# Firefox Bookmarks Parsing
+# ============================================================
+
+# Root folders by guid, named as in Firefox's HTML export (where the
+# Bookmarks Menu entries sit at the top level); the tags root is not a folder
+FIREFOX_ROOTS = {
+    'menu________': '',
+    'toolbar_____': 'Bookmarks Toolbar',
+    'unfiled_____': 'Other Bookmarks',
+    'mobile______': 'Mobile Bookmarks',
+}
+
+# All bookmarks with their folder path in tree order, in one query:
+# folder paths are joined with char(31) and tags are the titles of the
+# folders under the tags root that hold an entry for the same place
+FIREFOX_BOOKMARKS_QUERY = """
+WITH RECURSIVE
+    roots(guid, name, sort) AS (VALUES {roots}),
+    folders(id, path, sort) AS (
+        SELECT b.id, roots.name, roots.sort
+        FROM moz_bookmarks b JOIN roots ON roots.guid = b.guid
+        UNION ALL
+        SELECT b.id,
+               CASE WHEN trim(coalesce(b.title, '')) = '' THEN f.path ELSE f.path || char(31) || b.title END,
+               f.sort || printf('%08d/', b.position)
+        FROM moz_bookmarks b JOIN folders f ON b.parent = f.id
+        WHERE b.type = 2
+    ),
+    tags(fk, names) AS (
+        SELECT fk, group_concat(title, char(31)) FROM (
+            SELECT item.fk, tag.title
+            FROM moz_bookmarks item
+            JOIN moz_bookmarks tag ON tag.id = item.parent
+            JOIN moz_bookmarks tags_root ON tags_root.id = tag.parent AND tags_root.guid = 'tags________'
+            WHERE item.type = 1
+            ORDER BY item.fk, tag.title
+        )
+        GROUP BY fk
+    )
+SELECT p.url, f.path, b.title, b.dateAdded, tags.names
+FROM moz_bookmarks b
+JOIN folders f ON f.id = b.parent
+JOIN moz_places p ON p.id = b.fk
+LEFT JOIN tags ON tags.fk = b.fk
+WHERE b.type = 1 AND (p.url GLOB 'http://*' OR p.url GLOB 'https://*')
+ORDER BY f.sort || printf('%08d', b.position)
+"""
+
+
+def _split_names(joined):
+    return tuple(name.strip() for name in joined.split('\x1f') if name.strip()) if joined else ()
+
+
+def iter_firefox_bookmarks(path):
+    """
+    Stream bookmarks from a Firefox places.sqlite database
+
+    Firefox keeps the database locked while it runs, so a copy (with its
+    write-ahead log) is opened read-only. Bookmarks and their folder
+    paths come from a single recursive query and are read row by row;
+    folders become tags as in import-chrome, followed by the bookmark's
+    Firefox tags. Raises ValueError if the file is not a places database.
+    Yields: {'url': ..., 'tags': (folder, ..., tag, ...), 'title': ..., 'add_date': int or None}
+    """
+    import shutil
+    import sqlite3
+    import tempfile
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        copy = Path(tmp) / 'places.sqlite'
+        shutil.copyfile(path, copy)
+        if Path(f"{path}-wal").exists():
+            shutil.copyfile(f"{path}-wal", f"{copy}-wal")
+        
+        conn = sqlite3.connect(f"{copy.as_uri()}?mode=ro", uri=True)
+        try:
+            query = FIREFOX_BOOKMARKS_QUERY.format(roots=', '.join(['(?, ?, ?)'] * len(FIREFOX_ROOTS)))
+            roots = [(guid, name, f"{rank:08d}/") for rank, (guid, name) in enumerate(FIREFOX_ROOTS.items())]
+            rows = conn.execute(query, [value for root in roots for value in root])
+            folders = {}
+            for url, folder, title, added, tag_names in rows:
+                tags = folders.get(folder)
+                if tags is None:
+                    tags = folders[folder] = _split_names(folder)
+                if tag_names:
+                    tags = get_tag_table().intern(dict.fromkeys(tags + _split_names(tag_names)))
+                yield {
+                    'url': url,
+                    'tags': tags,
+                    'title': (title or '').strip(),
+                    'add_date': added // 1000000 if added else None,
+                }
+        except sqlite3.DatabaseError as e:
+            raise ValueError(f"not a Firefox places database ({e})") from None
+        finally:
+            conn.close()
+
+
+# ============================================================
+# Tag Operations
+# ============================================================
+
+def iter_bookmarks(config, query=None, concurrency=4, page_size=100, endpoint="/api/bookmarks/", counts=None):
+    """
+    Stream every bookmark matching a search query, page by page
+
+    The first page tells the total count; the remaining pages are then
+    requested in parallel and yielded in server order as they arrive, so
+    at most 2 * concurrency pages are held in memory. If counts is given,
+    counts['total'] is set to the server's count after the first page.
+    Raises RuntimeError (or ValueError for a broken body) on failure.
+    """
+    search = f"q={quote(query)}&" if query else ""
+    
+    def fetch_page(offset):
+        status, body = make_request("GET", f"{endpoint}?{search}limit={page_size}&offset={offset}", config)
+        if status != 200:
+            raise RuntimeError(f"{status} - {body}")
+        return json.loads(body)
+    
+    first = fetch_page(0)
+    count = first.get("count", 0)
+    if counts is not None:
+        counts['total'] = count
+    yield from first.get("results", [])
+    
+    # The server may cap the page size below what we asked for
+    page_size = len(first.get("results", [])) or page_size
+    if first.get("next") is None or count <= page_size:
+        return
+    
+    for offset, data in run_ordered(fetch_page, range(page_size, count, page_size), concurrency):
+        yield from data.get("results", [])
+
+
+def fetch_bookmarks(config, query=None, concurrency=4, page_size=100, endpoint="/api/bookmarks/"):
+    """
+    Fetch every bookmark matching a search query into an id-keyed snapshot
+
+    The whole result set is read before callers start modifying
+    bookmarks, so offset pages cannot shift under us.
+    Returns: {id: bookmark} in server order, or None on failure
+    """
+    snapshot = {}
+    try:
+        for bookmark in iter_bookmarks(config, query, concurrency, page_size, endpoint):
+            snapshot.setdefault(bookmark["id"], bookmark)
+    except (RuntimeError, ValueError) as e:
+        print(f"Failed to get bookmarks: {e}")
+        return None
+    
+    return snapshot
+
+
+def get_bookmarks_with_tag(tag, config, concurrency=4):
+    """Get all bookmarks with specified tag"""
+    snapshot = fetch_bookmarks(config, query=f"#{tag}", concurrency=concurrency)
+    return None if snapshot is None else list(snapshot.values())
+
+
+def replace_tag(current_tags, old_tag, new_tags):
+    """
+    Replace old_tag with new_tags, keeping the position of the old tag
+    Tags that are already present are not added twice.
+    Returns: the updated tag list, or None if old_tag is not present
+    """
+    if old_tag not in current_tags:
+        return None
+    
+    updated_tags = list(current_tags)
+    # Find the index of old_tag
+    tag_index = updated_tags.index(old_tag)
+    
+    # Remove old tag
+    updated_tags.pop(tag_index)
+    
+    # Add new tags at the same position (or at the end if out of bounds)
+    # This preserves the position order somewhat
+    for i, new_tag in enumerate(new_tags):
+        if new_tag not in updated_tags:
+            updated_tags.insert(tag_index + i, new_tag)
+        # If new_tag already exists, we don't add it again
+    
+    return updated_tags
+
+
+YAML_FLOW_ITEM = re.compile(r'\s*("(?:[^"\\]|\\.)*"|\'(?:[^\']|\'\')*\'|[^,]+)')
+YAML_KEY = re.compile(r'("(?:[^"\\]|\\.)*"|\'(?:[^\']|\'\')*\'|[^\s#][^:]*?)\s*:(?:\s+(.*))?$')
+YAML_NULLS = ('', '~', 'null', 'Null', 'NULL')
+
+
+def _yaml_strip_comment(text):
+    """Remove a trailing ' # comment' that is not inside quotes"""
+    quote_char = None
+    for i, char in enumerate(text):
+        if quote_char:
+            if char == quote_char:
+                quote_char = None
+        elif char in '"\'':
+            quote_char = char
+        elif char == '#' and (i == 0 or text[i - 1] in ' \t'):
+            return text[:i].rstrip()
+    return text.rstrip()
+
+
+def _yaml_scalar(text):
+    """Parse a plain or quoted YAML scalar; None for null"""
+    text = text.strip()
+    if len(text) >= 2 and text[0] == text[-1] == '"':
+        return json.loads(text)
+    if len(text) >= 2 and text[0] == text[-1] == "'":
+        return text[1:-1].replace("''", "'")
+    return None if text in YAML_NULLS else text
+
+
+def _split_tags(value):
+    """Comma-separated tag string -> list of tags (same syntax as rename-tag)"""
+    return [t.strip() for t in value.split(',') if t.strip()]
+
+
+def _yaml_tags(text):
+    """Value of a mapping entry -> list of new tags ([] deletes the tag)"""
+    text = text.strip()
+    if text.startswith('[') and text.endswith(']'):
+        tags = []
+        for item in YAML_FLOW_ITEM.findall(text[1:-1]):
+            value = _yaml_scalar(item)
+            if value:
+                tags.append(value.strip())
+        return tags
+    value = _yaml_scalar(text)
+    if value is None:
+        return []
+    if text[:1] in '"\'':
+        return [value.strip()] if value.strip() else []
+    return _split_tags(value)
+
+
+def parse_tag_mapping_yaml(lines, path="<mapping>"):
+    """
+    Parse a tag mapping written in a small subset of YAML:
+
+        old-tag: new-tag            # one-to-one
+        compound: [part1, part2]    # one-to-many (or "part1, part2")
+        typo: correct               # several keys with the same value merge
+        obsolete:                   # empty, null, ~ or [] deletes the tag
+        split:
+          - first
+          - second
+
+    Returns: [(old_tag, [new_tags])] in file order
+    
+        >>> parse_tag_mapping_yaml(['a: b  # one-to-one', 'c: [d, "e, f"]', 'g: h, i',
+        ...                         'obsolete: ~', 'split:', '  - j', "  - 'k'"])
+        [('a', ['b']), ('c', ['d', 'e, f']), ('g', ['h', 'i']), ('obsolete', []), ('split', ['j', 'k'])]
+    """
+    rules = []
+    block = None
+    
+    for lineno, raw in enumerate(lines, 1):
+        line = _yaml_strip_comment(raw.rstrip('\r\n'))
+        if not line.strip() or line.strip() in ('---', '...'):
+            continue
+        
+        if line[0] in ' \t':
+            item = line.strip()
+            if block is None or not item.startswith('-'):
+                raise ValueError(f"{path}:{lineno}: unexpected indentation")
+            value = _yaml_scalar(item[1:])
+            if value:
+                block.append(value.strip())
+            continue
+        
+        match = YAML_KEY.match(line)
+        if not match:
+            raise ValueError(f"{path}:{lineno}: expected 'old-tag: new-tags'")
+        old_tag = _yaml_scalar(match.group(1))
+        if not old_tag:
+            raise ValueError(f"{path}:{lineno}: empty tag name")
+        
+        value = match.group(2)
+        if value is None or not value.strip():
+            # Either a deletion or the start of a block list
+            block = []
+            rules.append((old_tag.strip(), block))
+        else:
+            block = None
+            rules.append((old_tag.strip(), _yaml_tags(value)))
+    
+    return rules
+
+
+def parse_tag_mapping_csv(lines):
+    """
+    Parse a tag mapping from CSV rows: old_tag,new_tag[,new_tag...]
+    A row with only the old tag deletes it. Lines starting with # and an
+    optional "old,new" style header row are ignored.
+    Returns: [(old_tag, [new_tags])] in file order
+    """
+    import csv
+    rules = []
+    for i, row in enumerate(csv.reader(lines)):
+        if not row or not row[0].strip() or row[0].lstrip().startswith('#'):
+            continue
+        if i == 0 and row[0].strip().lower() in ('old', 'old_tag', 'from'):
+            continue
+        new_tags = []
+        for cell in row[1:]:
+            new_tags.extend(_split_tags(cell))
+        rules.append((row[0].strip(), new_tags))
+    return rules
+
+
+def load_tag_mapping(path):
+    """
+    Load a tag mapping file (.csv, otherwise YAML)
+    Returns: {old_tag: [new_tags]} in file order, identity rules dropped
+    Raises ValueError on syntax errors or conflicting rules
+    """
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if path.lower().endswith('.csv'):
+            rules = parse_tag_mapping_csv(f)
+        else:
+            rules = parse_tag_mapping_yaml(f, path)
+    
+    mapping = {}
+    for old_tag, new_tags in rules:
+        # Remove duplicates while keeping order
+        new_tags = list(dict.fromkeys(new_tags))
+        if old_tag in mapping and mapping[old_tag] != new_tags:
+            raise ValueError(f"{path}: conflicting rules for tag [{old_tag}]")
+        if new_tags == [old_tag]:
+            continue
+        mapping[old_tag] = new_tags
+    return mapping
+
+
+def rewrite_tags(current_tags, mapping):
+    """
+    Apply every rule of a tag mapping to one bookmark's tags
+    
+    Each of the bookmark's tags is mapped once, in place, so rules never
+    apply to the result of another rule and the outcome does not depend
+    on rule order. Tags produced twice are kept at their first position.
+    
+        >>> rewrite_tags(['a', 'b'], {'a': ['b'], 'b': ['c']})
+        ['b', 'c']
+        >>> rewrite_tags(['x', 'obsolete'], {'obsolete': []})
+        ['x']
+        >>> rewrite_tags(['compound', 'part2'], {'compound': ['part1', 'part2']})
+        ['part1', 'part2']
+    """
+    updated_tags = {}
+    for tag in current_tags:
+        new_tags = mapping.get(tag)
+        for new_tag in (new_tags if new_tags is not None else (tag,)):
+            updated_tags.setdefault(new_tag)
+    return list(updated_tags)
+
+
+def update_bookmark_tags(bookmark_id, new_tags, config):
+    """Update bookmark tags"""
+    path = f"/api/bookmarks/{bookmark_id}/"
+    data = {"tag_names": new_tags}
+    
+    status, body = make_request("PATCH", path, config, data)
+    
+    if status in [200, 201]:
+        return True, None
+    else:
+        return False, f"{status}: {body}"
+
+
+def merge_bookmark_tags(url, tags, known, config):
+    """
+    Add tags to the existing bookmark of url, keeping the tags it has
+    known is its (bookmark_id, tag_names) from the mirror, (bookmark_id, None)
+    to read its current tags first, or None to look it up on the server.
+    A PATCH is only sent when a tag is actually new.
+    Returns: (success, error, bookmark_id, merged tags or None if unchanged),
+             or None if url is not bookmarked
+    """
+    if known is not None and known[0] is not None and known[1] is None:
+        status, body = make_request("GET", f"/api/bookmarks/{known[0]}/", config)
+        if status == 200:
+            known = known[0], json.loads(body).get("tag_names", [])
+        elif status == 404:
+            known = None
+        else:
+            return False, f"{status}: {body}", None, None
+    
+    if known is None or known[0] is None:
+        try:
+            known = find_bookmark(url, config)
+        except (RuntimeError, ValueError) as e:
+            return False, str(e), None, None
+        if known is None:
+            return None
+    
+    bookmark_id, server_tags = known
+    merged = merge_sync_tags(server_tags, (), tags)
+    if len(merged) == len(server_tags):
+        return True, None, bookmark_id, None
+    success, error = update_bookmark_tags(bookmark_id, merged, config)
+    return success, error, bookmark_id, merged
+
+
+def delete_bookmark(bookmark_id, config):
+    """
+    Delete bookmark
+    Returns: (success, error_message)
+    """
+    status, body = make_request("DELETE", f"/api/bookmarks/{bookmark_id}/", config)
+    if status in (200, 204):
+        return True, None
+    return False, f"{status}: {body}"
+
+
+# ============================================================
+# Export
+# ============================================================
+
+NETSCAPE_HEADER = """<!DOCTYPE NETSCAPE-Bookmark-file-1>
+<META HTTP-EQUIV="Content-Type" CONTENT="text/html; charset=UTF-8">
+<TITLE>Bookmarks</TITLE>
+<H1>Bookmarks</H1>
+<DL><p>
+"""
+NETSCAPE_FOOTER = "</DL><p>\n"
+
+
+def iso_to_timestamp(value):
+    """Unix timestamp of an API date such as 2024-01-31T12:00:00.123456Z, None if unparsable"""
+    from datetime import datetime
+    try:
+        return int(datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp())
+    except (AttributeError, ValueError):
+        return None
+
+
+def format_jsonl_bookmark(bookmark):
+    """One JSONL line holding the bookmark exactly as the API returned it"""
+    return json.dumps(bookmark, ensure_ascii=False) + '\n'
+
+
+def format_netscape_bookmark(bookmark):
+    """One <DT> entry in the Netscape format, with tags in the TAGS attribute"""
+    from html import escape
+    url = bookmark.get("url", "")
+    title = bookmark.get("title") or bookmark.get("website_title") or url
+    attrs = [f'HREF="{escape(url)}"']
+    for name, field in (("ADD_DATE", "date_added"), ("LAST_MODIFIED", "date_modified")):
+        timestamp = iso_to_timestamp(bookmark.get(field))
+        if timestamp is not None:
+            attrs.append(f'{name}="{timestamp}"')
+    attrs.append(f'PRIVATE="{0 if bookmark.get("shared") else 1}"')
+    attrs.append(f'TOREAD="{1 if bookmark.get("unread") else 0}"')
+    attrs.append(f'TAGS="{escape(",".join(bookmark.get("tag_names", [])))}"')
+    
+    entry = f'<DT><A {" ".join(attrs)}>{escape(title, quote=False)}</A>\n'
+    description = bookmark.get("description") or bookmark.get("website_description")
+    if description:
+        entry += f'<DD>{escape(description, quote=False)}\n'
+    return entry
+
+
+EXPORT_FORMATS = {
+    'jsonl': (format_jsonl_bookmark, '', ''),
+    'html': (format_netscape_bookmark, NETSCAPE_HEADER, NETSCAPE_FOOTER),
+}
+
+
+def export_format(path):
+    """Export format implied by a file name: html for .html/.htm, jsonl otherwise"""
+    name = path.name.lower()
+    if name.endswith('.gz'):
+        name = name[:-3]
+    return 'html' if name.endswith(('.html', '.htm')) else 'jsonl'
+
+
+def open_output(path, compress=False):
+    """Open a text file for writing, gzip compressed if compress is true"""
+    if compress:
+        import gzip
+        return gzip.open(path, 'wt', encoding='utf-8', compresslevel=6)
+    return open(path, 'w', encoding='utf-8', buffering=1 << 20)
+
+
+# ============================================================
+# Local Bookmark Mirror
+# ============================================================
+
+def get_cache_dir():
+    """Directory for local state such as the bookmark mirror"""
+    base = os.getenv('XDG_CACHE_HOME') or Path.home() / '.cache'
+    cache_dir = Path(base) / 'linkding-tools'
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+
+def server_cache_key(config):
+    """Short stable key identifying the server and account of a configuration"""
+    import hashlib
+    digest = hashlib.sha1(f"{config['url']}\0{config['token']}".encode('utf-8')).hexdigest()
+    host = urlparse(config['url']).netloc.replace(':', '_') or 'server'
+    return f"{host}-{digest[:12]}"
+
+
+# Answers of the check endpoint are reused for a day, for at most 100k URLs
+CHECK_CACHE_TTL = 24 * 3600
+CHECK_CACHE_SIZE = 100000
+
+
+class BookmarkMirror:
+    """Local SQLite snapshot of the server's bookmarks, looked up by url_key()
+
+    The snapshot is refreshed incrementally using the API's modified_since
+    filter. Deletions on the server are detected by comparing the bookmark
+    count with the snapshot size, which triggers a full rebuild. The state
+    written by --sync is kept per source, also by url_key().
+    """
+
+    ENDPOINTS = ("/api/bookmarks/", "/api/bookmarks/archived/")
+    PAGE_SIZE = 1000
+
+    def __init__(self, path):
+        import sqlite3
+        self.path = path
+        self.conn = sqlite3.connect(str(path))
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(bookmarks)")]
+        if columns and 'key' not in columns:
+            # Written before URLs were compared by url_key(): rebuild the snapshot
+            self.conn.execute("DROP TABLE bookmarks")
+            rekey = True
+        else:
+            rekey = False
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS bookmarks (
+                url TEXT PRIMARY KEY,
+                key TEXT NOT NULL,
+                id INTEGER,
+                tag_names TEXT NOT NULL,
+                date_modified TEXT
+            );
+            CREATE INDEX IF NOT EXISTS bookmarks_key ON bookmarks (key);
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+            CREATE TABLE IF NOT EXISTS sync_state (
+                source TEXT NOT NULL,
+                url TEXT NOT NULL,
+                tag_names TEXT NOT NULL,
+                PRIMARY KEY (source, url)
+            );
+        """)
+        if rekey:
+            rows = self.conn.execute("SELECT source, url, tag_names FROM sync_state").fetchall()
+            self.conn.execute("DELETE FROM sync_state")
+            self.conn.executemany("INSERT OR REPLACE INTO sync_state (source, url, tag_names) VALUES (?, ?, ?)",
+                                  [(source, url_key(url), tags) for source, url, tags in rows])
+            self.conn.execute("DELETE FROM meta WHERE key = 'last_modified'")
+            self.conn.commit()
+        self._pending = 0
+
+    def _get_meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _fetch(self, endpoint, config, modified_since=None):
+        """Page through an endpoint, yields bookmark dicts. Raises RuntimeError on failure."""
+        offset = 0
+        while True:
+            path = f"{endpoint}?limit={self.PAGE_SIZE}&offset={offset}"
+            if modified_since:
+                path += f"&modified_since={quote(modified_since)}"
+            
+            status, body = make_request("GET", path, config)
+            if status != 200:
+                raise RuntimeError(f"{status} - {body}")
+            
+            data = json.loads(body)
+            results = data.get("results", [])
+            yield from results
+            
+            if data.get("next") is None or not results:
+                break
+            offset += len(results)
+
+    def _server_count(self, config):
+        total = 0
+        for endpoint in self.ENDPOINTS:
+            status, body = make_request("GET", f"{endpoint}?limit=1", config)
+            if status != 200:
+                raise RuntimeError(f"{status} - {body}")
+            total += json.loads(body).get("count", 0)
+        return total
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM bookmarks").fetchone()[0]
+
+    def refresh(self, config, full=False):
+        """
+        Bring the snapshot up to date with the server
+        Returns: number of bookmarks fetched, or None if the server could not be read
+        """
+        since = None if full else self._get_meta('last_modified')
+        fetched = 0
+        
+        try:
+            with self.conn:
+                if since is None:
+                    self.conn.execute("DELETE FROM bookmarks")
+                
+                last_modified = since
+                for endpoint in self.ENDPOINTS:
+                    for bookmark in self._fetch(endpoint, config, since):
+                        modified = bookmark.get("date_modified")
+                        self.conn.execute(
+                            "INSERT OR REPLACE INTO bookmarks (url, key, id, tag_names, date_modified) VALUES (?, ?, ?, ?, ?)",
+                            (bookmark["url"], url_key(bookmark["url"]), bookmark.get("id"),
+                             json.dumps(bookmark.get("tag_names", [])), modified)
+                        )
+                        if modified and (last_modified is None or modified > last_modified):
+                            last_modified = modified
+                        fetched += 1
+                
+                if last_modified:
+                    self._set_meta('last_modified', last_modified)
+            
+            # modified_since cannot see deletions - rebuild when the sizes disagree
+            if since is not None and self._server_count(config) != len(self):
+                return self.refresh(config, full=True)
+        except (RuntimeError, ValueError) as e:
+            print(f"Failed to refresh bookmark mirror: {e}")
+            return None
+        
+        return fetched
+
+    def get(self, url):
+        """Returns: (bookmark_id, tag_names) of a bookmark with the same url_key(), or None"""
+        row = self.conn.execute("SELECT id, tag_names FROM bookmarks WHERE key = ?", (url_key(url),)).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def __contains__(self, url):
+        return self.conn.execute("SELECT 1 FROM bookmarks WHERE key = ?", (url_key(url),)).fetchone() is not None
+
+    def add(self, url, bookmark_id, tag_names):
+        """Record a bookmark created or changed by this tool"""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO bookmarks (url, key, id, tag_names, date_modified) VALUES (?, ?, ?, ?, NULL)",
+            (url, url_key(url), bookmark_id, json.dumps(list(tag_names)))
+        )
+        self._changed()
+
+    def remove(self, url):
+        """Forget a bookmark deleted by this tool"""
+        self.conn.execute("DELETE FROM bookmarks WHERE key = ?", (url_key(url),))
+        self._changed()
+
+    def sync_state(self, source):
+        """Returns: {url_key: tag_names} as written by the last sync of source"""
+        table = get_tag_table()
+        rows = self.conn.execute("SELECT url, tag_names FROM sync_state WHERE source = ?", (source,))
+        return {url: table.intern(json.loads(tags)) for url, tags in rows}
+
+    def set_sync_state(self, source, url, tag_names):
+        """Remember the tags source gave url (None forgets the url)"""
+        if tag_names is None:
+            self.conn.execute("DELETE FROM sync_state WHERE source = ? AND url = ?", (source, url_key(url)))
+        else:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sync_state (source, url, tag_names) VALUES (?, ?, ?)",
+                (source, url_key(url), json.dumps(list(tag_names)))
+            )
+        self._changed()
+
+    def _changed(self):
+        self._pending += 1
+        if self._pending >= 1000:
+            self.conn.commit()
+            self._pending = 0
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+
+def open_mirror(config, args):
+    """Open and refresh the local mirror if --mirror (or --sync, --upsert without --check) was given, else return None"""
+    upsert = getattr(args, 'upsert', False) and not getattr(args, 'check', False)
+    if not (upsert or any(getattr(args, option, False) for option in ('mirror', 'refresh_mirror', 'sync'))):
+        return None
+    
+    mirror = BookmarkMirror(get_cache_dir() / f"mirror-{server_cache_key(config)}.sqlite3")
+    print("Refreshing local bookmark mirror...")
+    fetched = mirror.refresh(config, full=getattr(args, 'refresh_mirror', False))
+    if fetched is None:
+        mirror.close()
+        return None
+    print(f"Mirror up to date: {len(mirror)} bookmarks ({fetched} fetched)")
+    return mirror
+
+
+class CheckCache:
+    """Local SQLite cache of check endpoint answers, keyed by URL
+
+    Keys are the exact URLs the endpoint was asked about (it matches URLs
+    exactly too), so a cached answer is the one a live check would give.
+    Both answers are kept: (bookmark_id, tag_names) for bookmarked URLs
+    and None for new ones. Answers older than `ttl` seconds are asked
+    again, and beyond `max_entries` the least recently used are evicted,
+    so the file stays small however many sources are imported.
+    """
+
+    MISS = object()     # get() result when there is no fresh answer
+
+    def __init__(self, path, ttl=CHECK_CACHE_TTL, max_entries=CHECK_CACHE_SIZE):
+        import sqlite3
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.conn = sqlite3.connect(str(path))
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS checks (
+                url TEXT PRIMARY KEY,
+                id INTEGER,
+                tag_names TEXT,
+                checked REAL NOT NULL,
+                used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS checks_used ON checks (used);
+        """)
+        self._pending = 0
+
+    def get(self, url):
+        """Returns: (bookmark_id, tag_names), None if the URL was not bookmarked, or MISS"""
+        now = time.time()
+        row = self.conn.execute("SELECT id, tag_names, checked FROM checks WHERE url = ?", (url,)).fetchone()
+        if row is None or now - row[2] > self.ttl:
+            return self.MISS
+        self.conn.execute("UPDATE checks SET used = ? WHERE url = ?", (now, url))
+        self._changed()
+        self.hits += 1
+        return None if row[1] is None else (row[0], json.loads(row[1]))
+
+    def put(self, url, known):
+        """Record the answer for url: (bookmark_id, tag_names) or None"""
+        now = time.time()
+        bookmark_id, tag_names = known if known is not None else (None, None)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO checks (url, id, tag_names, checked, used) VALUES (?, ?, ?, ?, ?)",
+            (url, bookmark_id, None if tag_names is None else json.dumps(list(tag_names)), now, now)
+        )
+        self._changed()
+
+    def _changed(self):
+        self._pending += 1
+        if self._pending >= 1000:
+            self.conn.commit()
+            self._pending = 0
+
+    def close(self):
+        """Drop expired and least recently used answers, then save"""
+        with self.conn:
+            self.conn.execute("DELETE FROM checks WHERE checked < ?", (time.time() - self.ttl,))
+            self.conn.execute(
+                "DELETE FROM checks WHERE url IN (SELECT url FROM checks ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+        self.conn.close()
+
+
+def open_check_cache(config, args):
+    """Open the check endpoint cache if --check was given, else return None"""
+    if not getattr(args, 'check', False):
+        return None
+    ttl = getattr(args, 'check_ttl', None)
+    path = get_cache_dir() / f"checks-{server_cache_key(config)}.sqlite3"
+    return CheckCache(path, ttl=CHECK_CACHE_TTL if ttl is None else ttl * 3600)
+
+
+# ============================================================
+# Import Journal
+# ============================================================
+
+class ImportJournal:
+    """
+    Append-only journal of finished import items, keyed by URL hash
+
+    Each finished URL is written as a 16 hex digit hash on its own line.
+    Writes are flushed and fsync'ed in batches (every `sync_every` records
+    or `sync_interval` seconds), so a crash loses at most one batch, which
+    is simply sent again on resume.
+    """
+
+    def __init__(self, path, resume=False, sync_every=1000, sync_interval=1.0):
+        self.path = Path(path)
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.done = set()
+        
+        if resume and self.path.exists():
+            with open(self.path, 'r', encoding='ascii', errors='ignore') as f:
+                self.done = {line.strip() for line in f if len(line.strip()) == 16}
+        
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'a' if resume else 'w', encoding='ascii')
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    @staticmethod
+    def key(url):
+        import hashlib
+        return hashlib.blake2b(url.encode('utf-8'), digest_size=8).hexdigest()
+
+    def __contains__(self, url):
+        return self.key(url) in self.done
+
+    def record(self, url):
+        """Mark url as finished"""
+        key = self.key(url)
+        self.done.add(key)
+        self._file.write(key + '\n')
+        self._unsynced += 1
+        if self._unsynced >= self.sync_every or time.monotonic() - self._last_sync >= self.sync_interval:
+            self.sync()
+
+    def sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        self.sync()
+        self._file.close()
+
+
+class Quarantine:
+    """
+    Links that failed in this run, written as JSONL that upload-jsonl can replay
+
+    Failed links are never journaled, so a resumed run retries them and
+    the file always describes the failures of the latest run only: the
+    previous run's file is removed at the start and a new one is only
+    created when something fails.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.count = 0
+        self._file = None
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def add(self, url, tags, status, error, fields=None):
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'w', encoding='utf-8')
+        record = {"url": url, "tag_names": list(tags), **(fields or {}), "status": status, "error": error}
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.count += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+def source_key(args):
+    """Short stable key identifying the import command and input file"""
+    import hashlib
+    source_path = Path(args.file).resolve()
+    return hashlib.sha1(f"{args.command}\0{source_path}".encode('utf-8')).hexdigest()[:12]
+
+
+def open_journal(config, args):
+    """
+    Open the journal and quarantine file of an import command
+    Returns: (journal, quarantine), journal is None if the command has no input file
+    """
+    source = getattr(args, 'file', None)
+    if not source:
+        return None, None
+    
+    resume = getattr(args, 'resume', False)
+    source_path = Path(source).resolve()
+    if getattr(args, 'journal', None):
+        journal_path = Path(args.journal)
+    else:
+        journal_path = get_cache_dir() / 'journals' / f"{server_cache_key(config)}-{source_key(args)}.journal"
+    
+    # Browser profile files (places.sqlite, Chrome's Bookmarks) are not ours to write next to
+    profile = source_path.is_dir() or args.command == 'import-firefox' or (
+        args.command == 'import-chrome' and not source_path.suffix)
+    if getattr(args, 'quarantine', None):
+        quarantine_path = Path(args.quarantine)
+    elif profile:
+        quarantine_path = get_cache_dir() / 'quarantine' / f"{source_key(args)}-{source_path.name}.failed.jsonl"
+    else:
+        quarantine_path = Path(f"{source_path}.failed.jsonl")
+    return ImportJournal(journal_path, resume=resume), Quarantine(quarantine_path)
+
+
+# ============================================================
+# Progress Reporting
+# ============================================================
+
+class Progress:
+    """
+    Per-item results of a command that changes bookmarks
+
+    By default every item is printed as a line. With --quiet or --log FILE
+    the per-item results stay off stdout (a log file is written through a
+    large buffer) and a progress line with counts, items/s and ETA is
+    shown instead. On a terminal it is redrawn in place every INTERVAL
+    seconds, otherwise a new line is printed every PLAIN_INTERVAL seconds
+    so CI logs stay short. --log-format jsonl writes one JSON object per
+    item instead of the text line.
+    """
+
+    INTERVAL = 0.5
+    PLAIN_INTERVAL = 10.0
+
+    def __init__(self, total=None, quiet=False, log_path=None, log_format='text', stream=None):
+        self.total = total
+        self._dropped = 0
+        self.stream = stream or sys.stdout
+        self.jsonl = log_format == 'jsonl'
+        self.counts = {"ok": 0, "skipped": 0, "failed": 0}
+        self.started = time.monotonic()
+        self.tty = self.stream.isatty()
+        self._next_draw = self.started + self.INTERVAL
+        self._width = 0
+        if log_path:
+            self.log = open(log_path, 'w', encoding='utf-8', buffering=1 << 20)
+        else:
+            self.log = None if quiet else self.stream
+        self.show_progress = self.log is not self.stream
+
+    @classmethod
+    def from_args(cls, args, total=None):
+        return cls(total, quiet=getattr(args, 'quiet', False), log_path=getattr(args, 'log', None),
+                   log_format=getattr(args, 'log_format', 'text'))
+
+    def report(self, status, line, **fields):
+        """Record one item: status is "ok", "skipped" or "failed", line its text form"""
+        self.counts[status] += 1
+        if self.log is not None:
+            if self.jsonl:
+                self.log.write(json.dumps({"status": status, **fields}, ensure_ascii=False) + '\n')
+            else:
+                self.log.write(line + '\n')
+        if self.show_progress:
+            now = time.monotonic()
+            if now >= self._next_draw:
+                self._draw(now)
+
+    def drop(self):
+        """An item of the total that will not be reported (e.g. finished by a resumed run)"""
+        self._dropped += 1
+        if self.total:
+            self.total -= 1
+
+    def count_total(self, count):
+        """Set the total from count() run in a background thread, so work can start at once"""
+        def run():
+            try:
+                total = count()
+            except OSError:
+                return
+            self.total = max(0, total - self._dropped)
+        threading.Thread(target=run, name='count-total', daemon=True).start()
+
+    def _draw(self, now, final=False):
+        done = sum(self.counts.values())
+        elapsed = now - self.started
+        rate = done / elapsed if elapsed > 0 else 0.0
+        text = f"  {done:,}"
+        if self.total:
+            text += f"/{self.total:,} ({min(done / self.total, 1):.0%})"
+        text += (f"  ✓ {self.counts['ok']:,}  ⊘ {self.counts['skipped']:,}  ✗ {self.counts['failed']:,}"
+                 f"  {rate:,.0f}/s")
+        if final:
+            text += f"  in {format_duration(elapsed)}"
+        elif self.total and rate > 0:
+            text += f"  ETA {format_duration(max(0, self.total - done) / rate)}"
+        
+        if self.tty:
+            self.stream.write('\r' + text.ljust(self._width))
+            self._width = len(text)
+            self._next_draw = now + self.INTERVAL
+        else:
+            self.stream.write(text + '\n')
+            self._next_draw = now + self.PLAIN_INTERVAL
+        self.stream.flush()
+
+    def close(self):
+        """Draw the final progress line and flush the log"""
+        if self.show_progress:
+            self._draw(time.monotonic(), final=True)
+            if self.tty:
+                self.stream.write('\n')
+        if self.log is not None and self.log is not self.stream:
+            self.log.close()
+        else:
+            self.stream.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
 
 
 # ============================================================
-# HTTP Utilities
+# Upload Engine
 # ============================================================
 
-def make_request(method, path, config, data=None):
-    """Send HTTP request"""
-    parsed = urlparse(config['url'])
+def prefetch(iterable, maxsize=1000):
+    """
+    Produce items from iterable in a background thread
+    At most maxsize items are buffered, so a slow consumer applies
+    backpressure to the producer instead of growing memory.
+    """
+    import queue
+    buffer = queue.Queue(maxsize)
+    done = object()
+    errors = []
     
-    if parsed.scheme == 'https':
-        context = ssl.create_default_context()
-        conn = http.client.HTTPSConnection(parsed.netloc, context=context)
-    else:
-        conn = http.client.HTTPConnection(parsed.netloc)
+    def produce():
+        try:
+            for item in iterable:
+                buffer.put(item)
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            buffer.put(done)
     
-    headers = {
-        "Authorization": f"Token {config['token']}",
-        "Content-Type": "application/json"
-    }
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
     
-    body = json.dumps(data).encode('utf-8') if data else None
+    while True:
+        item = buffer.get()
+        if item is done:
+            break
+        yield item
     
-    try:
-        conn.request(method, path, body=body, headers=headers)
-        response = conn.getresponse()
-        response_body = response.read().decode('utf-8')
-        return response.status, response_body
-    except Exception as e:
-        return None, str(e)
-    finally:
-        conn.close()
-
-
-def test_connection(config):
-    """Test API connection"""
-    status, body = make_request("GET", "/api/bookmarks/?limit=1", config)
-    return status == 200, status
+    thread.join()
+    if errors:
+        raise errors[0]
 
 
-def create_bookmark(url, tag_names, config):
-    """Create a bookmark"""
-    data = {
-        "url": url,
-        "tag_names": tag_names
-    }
-    
-    status, body = make_request("POST", "/api/bookmarks/", config, data)
-    
-    if status in [200, 201]:
-        return True, status, None
-    else:
-        return False, status, body
+def run_ordered(func, items, concurrency=1):
+    """
+    Apply func to every item on a bounded thread pool
+    Yields: (item, result) in input order
 
+    At most 2 * concurrency items are in flight at any time, so items can
+    be a lazy iterator of any size.
+    """
+    if concurrency <= 1:
+        for item in items:
+            yield item, func(item)
+        return
+    
+    from concurrent.futures import ThreadPoolExecutor
+    window = concurrency * 2
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending = deque()
+        for item in items:
+            pending.append((item, executor.submit(func, item)))
+            if len(pending) >= window:
+                done_item, future = pending.popleft()
+                yield done_item, future.result()
+        while pending:
+            done_item, future = pending.popleft()
+            yield done_item, future.result()
 
-# ============================================================
-# Markdown Parsing
-# ============================================================
 
-def is_valid_url(url):
-    """Check if it is a valid URL"""
-    try:
-        result = urlparse(url)
-        return all([result.scheme, result.netloc])
-    except:
-        return False
+def configure_session(args):
+    """Install the rate limiter (--max-rate) and retry budget (--retries) of a command"""
+    session = get_session()
+    max_rate = getattr(args, 'max_rate', 0)
+    session.limiter = RateLimiter(max_rate) if max_rate and max_rate > 0 else None
+    retries = getattr(args, 'retries', None)
+    if retries is not None:
+        session.retry_policy = RetryPolicy(retries=max(0, retries))
 
 
-def extract_links_from_markdown(content, base_tag):
+def upload_links(links, config, args, show_tags=False, total=None):
     """
-    Extract links and corresponding tags from Markdown content
-    Returns: [(url, tags), ...]
+    Create bookmarks for (url, tags) pairs and report one result per link
+    Links finished in a previous run are skipped with --resume, failed ones
+    are written to the quarantine file. With --upsert, the tags of URLs that
+    already exist are merged into their bookmarks instead of being dropped.
+    total is the expected number of links when links is a stream, for the
+    progress line, or a function counting them that runs in the background.
+    Returns: {"success": n, "updated": n, "skipped": n, "failed": n, "resumed": n}
     """
-    results = []
-    lines = content.split('\n')
-    current_sections = []
+    width = 50 if show_tags else 60
+    upsert = getattr(args, 'upsert', False)
+    configure_session(args)
+    mirror = open_mirror(config, args)
+    checks = open_check_cache(config, args) if mirror is None else None
+    journal, quarantine = open_journal(config, args)
+    stats = {"success": 0, "updated": 0, "skipped": 0, "failed": 0, "resumed": 0}
+    probes = 0
+    if hasattr(links, '__len__'):
+        progress = Progress.from_args(args, len(links))
+    elif callable(total):
+        progress = Progress.from_args(args)
+        if progress.show_progress:
+            progress.count_total(total)
+    else:
+        progress = Progress.from_args(args, total)
+    
+    def prepare(links):
+        """Yields: (url, tags, fields, known bookmark or None, whether to ask the server first)"""
+        for link in links:
+            url, tags = link
+            fields = getattr(link, 'fields', None)
+            if journal is not None and url in journal:
+                stats["resumed"] += 1
+                progress.drop()
+                continue
+            if mirror is not None:
+                yield url, tags, fields, mirror.get(url), False
+            elif checks is not None:
+                known = checks.get(url)
+                # With --upsert a cached "new" answer is checked again, see
+                # upload(), and of an "exists" answer only the id is used:
+                # its tags may have changed on the server since
+                probe = known is CheckCache.MISS or (upsert and known is None)
+                if probe:
+                    known = None
+                elif upsert:
+                    known = known[0], None
+                yield url, tags, fields, known, probe
+            else:
+                yield url, tags, fields, None, upsert
     
-    for line in lines:
-        # Check if it is a list item
-        list_match = re.match(r'^(\s*)([-*+]|\d+\.)\s+(.+)$', line)
-        
-        if list_match:
-            indent = list_match.group(1)
-            content_text = list_match.group(3).strip()
-            level = len(indent) // 2 if indent else 0
+    def upload(item):
+        url, tags, fields, known, probe = item
+        if probe:
+            # Only new URLs are created: servers that accept duplicate POSTs
+            # would replace the tags of existing bookmarks
+            try:
+                known = find_bookmark(url, config)
+            except (RuntimeError, ValueError) as e:
+                return "unchecked", str(e), None
+        if known is not None:
+            if not upsert:
+                return "exists", None, known
+            merged = merge_bookmark_tags(url, tags, known, config)
+            if merged is not None:
+                return "merge", merged, known
+        result = create_bookmark(url, tags, config, fields)
+        if upsert and result[1] == 400:
+            merged = merge_bookmark_tags(url, tags, None, config)
+            if merged is not None:
+                return "merge", merged, known
+        return "create", result, known
+    
+    def remember(url, bookmark_id, tags):
+        if mirror is not None:
+            mirror.add(url, bookmark_id, tags)
+        elif checks is not None:
+            checks.put(url, (bookmark_id, tags))
+    
+    try:
+        for (url, tags, fields, _, probe), (action, result, known) in run_ordered(upload, prepare(links), args.concurrency):
+            if action == "unchecked":
+                stats["failed"] += 1
+                progress.report("failed", f"  ✗ {url[:width]}... (check failed: {result})",
+                                url=url, action="check", error=result)
+                if quarantine is not None:
+                    quarantine.add(url, tags, None, result, fields)
+                continue
             
-            # Check if it is a markdown link
-            has_md_link = bool(re.search(r'\[([^\]]*)\]\(https?://', content_text))
+            if probe:
+                probes += 1
+                if checks is not None:
+                    checks.put(url, known)
             
-            if has_md_link:
-                md_links = re.findall(r'\[([^\]]*)\]\((https?://[^\)]+)\)', content_text)
-                for text, url in md_links:
-                    url = re.sub(r'[,;。，；]+$', '', url)
-                    if is_valid_url(url):
-                        tags = [base_tag] + current_sections.copy() if base_tag else current_sections.copy()
-                        results.append((url, tags))
-            else:
-                has_plain_url = bool(re.search(r'https?://', content_text))
-                
-                if has_plain_url:
-                    plain_urls = re.findall(r'https?://[^\s\)]+', content_text)
-                    for url in plain_urls:
-                        url = re.sub(r'[,;。，；]+$', '', url)
-                        if is_valid_url(url):
-                            tags = [base_tag] + current_sections.copy() if base_tag else current_sections.copy()
-                            results.append((url, tags))
+            if action == "exists":
+                stats["skipped"] += 1
+                progress.report("skipped", f"  ⊘ {url[:width]}... (already exists)", url=url, reason="exists")
+                if journal is not None:
+                    journal.record(url)
+                continue
+            
+            if action == "merge":
+                success, error, bookmark_id, merged = result
+                if not success:
+                    stats["failed"] += 1
+                    progress.report("failed", f"  ✗ {url[:width]}... (tag merge failed: {error})",
+                                    url=url, action="merge", error=error)
+                    if quarantine is not None:
+                        quarantine.add(url, tags, None, error, fields)
+                    continue
+                if merged is None:
+                    stats["skipped"] += 1
+                    progress.report("skipped", f"  ⊘ {url[:width]}... (already exists with these tags)",
+                                    url=url, reason="unchanged")
                 else:
-                    # Plain title
-                    clean_title = content_text
-                    clean_title = re.sub(r'\*\*(.+?)\*\*', r'\1', clean_title)
-                    clean_title = re.sub(r'\[([^\]]+)\]\([^\)]+\)', r'\1', clean_title)
-                    
-                    if level >= len(current_sections):
-                        current_sections.append(clean_title)
-                    else:
-                        current_sections = current_sections[:level] + [clean_title]
-        else:
-            # Non-list item, check plain URL
-            plain_urls = re.findall(r'https?://[^\s\)]+', line)
-            for url in plain_urls:
-                url = re.sub(r'[,;。，；]+$', '', url)
-                if is_valid_url(url):
-                    tags = [base_tag] + current_sections.copy() if base_tag else current_sections.copy()
-                    results.append((url, tags))
-    
-    return results
+                    stats["updated"] += 1
+                    remember(url, bookmark_id, merged)
+                    progress.report("ok", f"  ↻ [{', '.join(merged)}] {url[:width]}...",
+                                    url=url, action="merge", tags=merged)
+                if journal is not None:
+                    journal.record(url)
+                continue
+            
+            success, status_code, error = result
+            if success or status_code in [200, 201]:
+                stats["success"] += 1
+                remember(url, None, tags)
+                if show_tags:
+                    tag_str = " > ".join(tags) if tags else "((no tags))"
+                    line = f"  ✓ [{tag_str}] {url[:width]}..."
+                else:
+                    line = f"  ✓ {url[:width]}..."
+                progress.report("ok", line, url=url, tags=list(tags))
+            elif status_code == 400:
+                stats["skipped"] += 1
+                progress.report("skipped", f"  ⊘ {url[:width]}... (already exists or invalid)",
+                                url=url, reason="rejected", status_code=status_code)
+            else:
+                stats["failed"] += 1
+                progress.report("failed", f"  ✗ {url[:width]}... (error: {status_code})",
+                                url=url, status_code=status_code, error=error)
+                if quarantine is not None:
+                    quarantine.add(url, tags, status_code, error, fields)
+                continue
+            
+            if journal is not None:
+                journal.record(url)
+    except KeyboardInterrupt:
+        if journal is not None:
+            print("\nInterrupted - finished links are saved, run the same command with --resume to continue")
+        raise
+    finally:
+        progress.close()
+        if mirror is not None:
+            mirror.close()
+        if checks is not None:
+            checks.close()
+        if journal is not None:
+            journal.close()
+            quarantine.close()
+    
+    get_metrics().results.update(stats)
+    if checks is not None:
+        print(f"\nExistence checks: {checks.hits} answered from the cache, {probes} sent to the server")
+    if stats["resumed"]:
+        print(f"\nResumed: {stats['resumed']} links were already done in a previous run")
+    if quarantine is not None and quarantine.count:
+        print(f"\n{quarantine.count} failed links written to {quarantine.path}")
+        print(f"Retry them with: linkding-tools upload-jsonl {quarantine.path}")
+    return stats
 
 
-# ============================================================
-# Chrome Bookmarks Parsing
-# ============================================================
+def merge_sync_tags(server_tags, previous_tags, source_tags):
+    """
+    Tags a bookmark should have after a sync
+    Tags the source dropped since the last sync are removed, tags it
+    added are appended and tags added on the server by hand are kept.
+    Tag names are compared case-insensitively like Linkding does.
+    """
+    dropped = {t.lower() for t in previous_tags} - {t.lower() for t in source_tags}
+    tags = [t for t in server_tags if t.lower() not in dropped]
+    seen = {t.lower() for t in tags}
+    for tag in source_tags:
+        if tag.lower() not in seen:
+            seen.add(tag.lower())
+            tags.append(tag)
+    return tags
 
-def parse_chrome_bookmarks(html_content):
-    """Parse Chrome bookmarks HTML file"""
-    bookmarks = []
-    folder_stack = []
-    lines = html_content.split('\n')
-    
-    for i, line in enumerate(lines):
-        line_stripped = line.strip()
-        indent_level = (len(line) - len(line.lstrip())) // 4
-        
-        # Handle folder closing: </DL> closes the folder at current indent_level
-        # The folder at level N is stored at folder_stack[N-1], so we need to remove it
-        if '</DL>' in line_stripped:
-            # Keep only folders before this level (folder_stack[:N-1] for level N)
-            if indent_level > 0:
-                folder_stack = folder_stack[:indent_level-1]
-        
-        elif '<H3' in line_stripped:
-            h3_match = re.search(r'>([^<]+)<', line_stripped)
-            if h3_match:
-                folder_name = h3_match.group(1).strip()
-                folder_name = folder_name.replace('&amp;', '&')
-                folder_name = folder_name.replace('&lt;', '<')
-                folder_name = folder_name.replace('&gt;', '>')
-                folder_name = folder_name.replace('&quot;', '"')
-                folder_name = folder_name.replace('&apos;', "'")
-                folder_stack = folder_stack[:indent_level] + [folder_name]
-        
-        elif '<A HREF=' in line_stripped:
-            url_match = re.search(r'HREF="([^"]+)"', line_stripped)
-            text_match = re.search(r'>([^<]+)<', line_stripped)
-            
-            if url_match:
-                url = url_match.group(1)
-                title = text_match.group(1) if text_match else ""
-                
-                if url.startswith('http://') or url.startswith('https://'):
-                    tags = folder_stack[:indent_level] if indent_level > 0 else []
-                    bookmarks.append({
-                        'url': url,
-                        'tags': tags,
-                        'title': title
-                    })
-    
-    return bookmarks
 
+def plan_sync(links, mirror, previous, delete=False):
+    """
+    Diff the source against the mirrored server state
+    Returns: (operations, stats) where operations are
+             ("create", url, tags, None, fields), ("update", url, tags, bookmark_id, None)
+             and ("delete", url, None, bookmark_id, None)
+    """
+    operations = []
+    stats = {"create": 0, "update": 0, "delete": 0, "unchanged": 0, "removed": 0}
+    seen = set()
+    
+    for link in links:
+        url, tags = link
+        key = url_key(url)
+        seen.add(key)
+        known = mirror.get(url)
+        if known is None:
+            operations.append(("create", url, list(tags), None, getattr(link, 'fields', None)))
+            stats["create"] += 1
+            continue
+        
+        bookmark_id, server_tags = known
+        tags = merge_sync_tags(server_tags, previous.get(key, ()), tags)
+        if {t.lower() for t in tags} == {t.lower() for t in server_tags}:
+            stats["unchanged"] += 1
+        else:
+            operations.append(("update", url, tags, bookmark_id, None))
+            stats["update"] += 1
+    
+    # URLs this source synced before but no longer contains (previous is keyed by url_key)
+    for url in previous:
+        if url in seen:
+            continue
+        stats["removed"] += 1
+        known = mirror.get(url)
+        if delete and known is not None:
+            operations.append(("delete", url, None, known[0], None))
+            stats["delete"] += 1
+    
+    return operations, stats
 
-# ============================================================
-# Tag Operations
-# ============================================================
 
-def get_bookmarks_with_tag(tag, config):
-    """Get all bookmarks with specified tag"""
-    all_bookmarks = []
-    offset = 0
-    limit = 100
+def sync_links(links, config, args, show_tags=False):
+    """
+    Bring the server in line with a source: create new URLs, PATCH changed
+    tags and, with --delete, delete URLs removed from the source since the
+    last sync. Server state comes from the local mirror, so the number of
+    requests is proportional to the change, not to the size of the source.
+    Returns: {"created": n, "updated": n, "deleted": n, "unchanged": n, "skipped": n, "failed": n},
+             or None if nothing was done
+    """
+    width = 50 if show_tags else 60
+    configure_session(args)
+    mirror = open_mirror(config, args)
+    if mirror is None:
+        print("Sync needs the server state, aborting")
+        return None
     
-    while True:
-        query = quote(f"#{tag}")
-        path = f"/api/bookmarks/?q={query}&limit={limit}&offset={offset}"
+    source = source_key(args)
+    
+    try:
+        previous = mirror.sync_state(source)
+        operations, plan = plan_sync(links, mirror, previous, delete=args.delete)
         
-        status, body = make_request("GET", path, config)
+        print(f"\nSync plan: create {plan['create']}, update {plan['update']}, "
+              f"delete {plan['delete']}, unchanged {plan['unchanged']}")
+        if plan["removed"] > plan["delete"]:
+            print(f"  {plan['removed'] - plan['delete']} URLs removed from the source are kept on the server "
+                  f"(use --delete to delete them)")
         
-        if status != 200:
-            print(f"Failed to get bookmarks: {status} - {body}")
+        if args.dry_run:
+            for action, url, tags, _, _ in operations:
+                tag_str = f" [{', '.join(tags)}]" if tags is not None else ""
+                print(f"  {action}: {url[:width]}...{tag_str}")
+            print("\nDry run: nothing was changed")
             return None
         
-        data = json.loads(body)
-        results = data.get("results", [])
-        all_bookmarks.extend(results)
+        stats = {"created": 0, "updated": 0, "deleted": 0, "unchanged": plan["unchanged"], "skipped": 0, "failed": 0}
+        failed = set()
+        progress = Progress.from_args(args, len(operations))
         
-        if data.get("next") is None or len(results) < limit:
-            break
+        if operations and not args.yes:
+            confirm = input("\nApply these changes? (y/n): ").strip().lower()
+            if confirm != 'y':
+                print("Sync cancelled")
+                return None
         
-        offset += limit
-    
-    return all_bookmarks
-
-
-def update_bookmark_tags(bookmark_id, new_tags, config):
-    """Update bookmark tags"""
-    path = f"/api/bookmarks/{bookmark_id}/"
-    data = {"tag_names": new_tags}
-    
-    status, body = make_request("PATCH", path, config, data)
-    
-    if status in [200, 201]:
-        return True, None
-    else:
-        return False, f"{status}: {body}"
+        def apply(operation):
+            action, url, tags, bookmark_id, fields = operation
+            if action == "create":
+                success, status_code, _ = create_bookmark(url, tags, config, fields)
+                return success or status_code in [200, 201], status_code
+            if action == "update":
+                return update_bookmark_tags(bookmark_id, tags, config)
+            return delete_bookmark(bookmark_id, config)
+        
+        with progress:
+            for (action, url, tags, bookmark_id, _), (success, error) in run_ordered(apply, operations, args.concurrency):
+                tag_names = None if tags is None else list(tags)
+                if success:
+                    stats[f"{action}d"] += 1
+                    progress.report("ok", f"  ✓ {action.capitalize()}d: {url[:width]}...",
+                                    action=action, url=url, tags=tag_names)
+                    if action == "delete":
+                        mirror.remove(url)
+                    else:
+                        mirror.add(url, bookmark_id, tags)
+                elif action == "create" and error == 400:
+                    stats["skipped"] += 1
+                    progress.report("skipped", f"  ⊘ {url[:width]}... (already exists or invalid)",
+                                    action=action, url=url, status_code=error)
+                else:
+                    stats["failed"] += 1
+                    failed.add(url)
+                    progress.report("failed", f"  ✗ {action} failed: {url[:width]}... ({error})",
+                                    action=action, url=url, error=error)
+        
+        # Remember what the source contained; failed changes keep the old
+        # state so the next sync computes the same change again
+        for url, tags in links:
+            if url not in failed:
+                mirror.set_sync_state(source, url, tags)
+        for key in previous:
+            if key not in mirror:
+                mirror.set_sync_state(source, key, None)
+        get_metrics().results.update(stats)
+        return stats
+    finally:
+        mirror.close()
 
 
 # ============================================================
 # Command Implementations
 # ============================================================
 
+def format_upload_result(stats):
+    """Counts of an upload_links run for the summary line"""
+    merged = f", tags merged {stats['updated']}" if stats.get("updated") else ""
+    return f"success {stats['success']}{merged}, skipped {stats['skipped']}, failed {stats['failed']}"
+
+
+def print_sync_result(stats):
+    """Print the summary line of a --sync run"""
+    if stats is not None:
+        print(f"\nSync completed: created {stats['created']}, updated {stats['updated']}, "
+              f"deleted {stats['deleted']}, unchanged {stats['unchanged']}, "
+              f"skipped {stats['skipped']}, failed {stats['failed']}")
+    return 0
+
+
 def cmd_upload_markdown(args, config):
-    """Extract links from Markdown file and upload"""
+    """Extract links from a Markdown file, or every Markdown file below a directory, and upload"""
     md_file = Path(args.file)
     
     if not md_file.exists():
         print(f"Error: File {md_file} does not exist")
         return 1
     
-    # Read Markdown file
-    with open(md_file, 'r', encoding='utf-8') as f:
-        content = f.read()
+    metrics = get_metrics()
+    hashes = None
     
-    # Determine base tag
-    base_tag = args.tag if args.tag else md_file.stem
-    
-    # Extract links
-    links = extract_links_from_markdown(content, base_tag)
+    if md_file.is_dir():
+        # Base tags come from the relative paths, --tag is put in front of them
+        with metrics.phase('parse'):
+            links, hashes = read_markdown_directory(md_file, config, args)
+    else:
+        # Determine base tag
+        base_tag = args.tag if args.tag else md_file.stem
+        
+        # Extract links, scanning the memory-mapped file
+        try:
+            with metrics.phase('parse'):
+                links = extract_links_from_markdown_file(md_file, base_tag)
+        except UnicodeDecodeError as e:
+            print(f"Error: {md_file} is not valid UTF-8 ({e.reason} at byte {e.start} of a line)")
+            return 1
+    with metrics.phase('dedup'):
+        links, duplicates, invalid = dedupe_links(links, canonicalize=not args.no_canonicalize)
     
     if not links:
         print("No links found")
+        if hashes is not None:
+            hashes.save()
         return 0
     
     print(f"Found {len(links)} links")
+    print_dedupe_summary(duplicates, invalid)
+    
+    if args.sync:
+        stats = sync_links(links, config, args)
+        if hashes is not None and stats is not None and not stats["failed"]:
+            hashes.save()
+        return print_sync_result(stats)
     
     if not args.yes:
         confirm = input("\nStart upload? (y/n): ").strip().lower()
@@ -318,106 +3153,113 @@ def cmd_upload_markdown(args, config):
             return 0
     
     # Upload
-    stats = {"success": 0, "skipped": 0, "failed": 0}
+    stats = upload_links(links, config, args)
     
-    for url, tags in links:
-        success, status_code, error = create_bookmark(url, tags, config)
-        
-        if success or status_code in [200, 201]:
-            stats["success"] += 1
-            print(f"  ✓ {url[:60]}...")
-        elif status_code == 400:
-            stats["skipped"] += 1
-            print(f"  ⊘ {url[:60]}... (already exists or invalid)")
-        else:
-            stats["failed"] += 1
-            print(f"  ✗ {url[:60]}... (error: {status_code})")
-        
-        time.sleep(0.1)
+    # Files are only marked done when none of the links failed, so failed links are retried next time
+    if hashes is not None and not stats["failed"]:
+        hashes.save()
     
-    print(f"\nUpload completed: success {stats['success']}, skipped {stats['skipped']}, failed {stats['failed']}")
+    print(f"\nUpload completed: {format_upload_result(stats)}")
     return 0
 
 
 def cmd_upload_jsonl(args, config):
-    """Upload links from JSONL file"""
+    """Upload links from JSONL file (streamed, memory use does not grow with file size)"""
     jsonl_file = Path(args.file)
     
     if not jsonl_file.exists():
         print(f"Error: File {jsonl_file} does not exist")
         return 1
     
-    # Read JSONL file
-    with open(jsonl_file, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-    
-    links = []
-    for line in lines:
-        line = line.strip()
-        if line:
-            try:
-                data = json.loads(line)
-                url = data.get("url", "")
-                tag_names = data.get("tag_names", [])
-                if url:
-                    links.append((url, tag_names))
-            except json.JSONDecodeError:
-                pass
-    
-    if not links:
-        print("No links found")
-        return 0
-    
-    print(f"Found {len(links)} links")
+    if args.sync:
+        # Sync needs the whole source to find removed URLs
+        reader = JsonlReader(jsonl_file)
+        metrics = get_metrics()
+        with metrics.phase('dedup'):
+            links, duplicates, invalid = dedupe_links(metrics.timed_iter('parse', reader),
+                                                      canonicalize=not args.no_canonicalize)
+        reader.print_summary()
+        print(f"Found {len(links)} links")
+        print_dedupe_summary(duplicates, invalid)
+        return print_sync_result(sync_links(links, config, args))
     
     if not args.yes:
+        print(f"Found {count_lines(jsonl_file)} lines")
         confirm = input("\nStart upload? (y/n): ").strip().lower()
         if confirm != 'y':
             print("Upload cancelled")
             return 0
     
-    # Upload
-    stats = {"success": 0, "skipped": 0, "failed": 0}
+    # Read, decode and validate lines in the background while uploading
+    reader = JsonlReader(jsonl_file)
+    counts = {}
+    metrics = get_metrics()
+    links = validate_stream(metrics.timed_iter('parse', reader), canonicalize=not args.no_canonicalize, counts=counts)
+    links = prefetch(metrics.timed_iter('dedup', links))
     
-    for url, tags in links:
-        success, status_code, error = create_bookmark(url, tags, config)
-        
-        if success or status_code in [200, 201]:
-            stats["success"] += 1
-            print(f"  ✓ {url[:60]}...")
-        elif status_code == 400:
-            stats["skipped"] += 1
-            print(f"  ⊘ {url[:60]}... (already exists or invalid)")
-        else:
-            stats["failed"] += 1
-            print(f"  ✗ {url[:60]}... (error: {status_code})")
-        
-        time.sleep(0.1)
+    # Upload; the lines are counted alongside, only for the progress line's ETA
+    stats = upload_links(links, config, args, total=lambda: count_lines(jsonl_file))
     
-    print(f"\nUpload completed: success {stats['success']}, skipped {stats['skipped']}, failed {stats['failed']}")
+    if not any(stats.values()):
+        print("No links found")
+    reader.print_summary()
+    print_dedupe_summary(0, counts.get('invalid', 0))
+    print(f"\nUpload completed: {format_upload_result(stats)}")
     return 0
 
 
 def cmd_import_chrome(args, config):
-    """Import Chrome bookmarks"""
-    html_file = Path(args.file)
+    """Import Chrome bookmarks from an HTML export or the profile's JSON Bookmarks file"""
+    bookmarks_file = Path(args.file)
+    if bookmarks_file.is_dir():
+        bookmarks_file = bookmarks_file / 'Bookmarks'
     
-    if not html_file.exists():
-        print(f"Error: File {html_file} does not exist")
+    if not bookmarks_file.exists():
+        print(f"Error: File {bookmarks_file} does not exist")
         return 1
     
-    # Read HTML file
-    with open(html_file, 'r', encoding='utf-8') as f:
-        html_content = f.read()
+    with open(bookmarks_file, 'rb') as f:
+        parse = iter_chrome_json_bookmarks if is_chrome_json(f) else iter_netscape_bookmarks
+        return import_browser_bookmarks(parse(f), bookmarks_file, args, config)
+
+
+def cmd_import_firefox(args, config):
+    """Import Firefox bookmarks from places.sqlite"""
+    places_file = Path(args.file)
+    if places_file.is_dir():
+        places_file = places_file / 'places.sqlite'
+    
+    if not places_file.exists():
+        print(f"Error: File {places_file} does not exist")
+        return 1
     
-    # Parse bookmarks
-    bookmarks = parse_chrome_bookmarks(html_content)
+    return import_browser_bookmarks(iter_firefox_bookmarks(places_file), places_file, args, config)
+
+
+def import_browser_bookmarks(bookmarks, source, args, config):
+    """Dedupe and import (or sync) the bookmark dicts of a browser parser"""
+    # Parse bookmarks while reading the source
+    metrics = get_metrics()
+    links = (
+        Bookmark.from_tags(bookmark['url'], bookmark['tags'])
+        for bookmark in metrics.timed_iter('parse', bookmarks)
+    )
+    try:
+        with metrics.phase('dedup'):
+            links, duplicates, invalid = dedupe_links(links, canonicalize=not args.no_canonicalize)
+    except (OSError, ValueError) as e:
+        print(f"Error: Cannot parse {source}: {e}")
+        return 1
     
-    if not bookmarks:
+    if not links:
         print("No bookmarks found")
         return 0
     
-    print(f"Found {len(bookmarks)} bookmarks")
+    print(f"Found {len(links)} bookmarks")
+    print_dedupe_summary(duplicates, invalid)
+    
+    if args.sync:
+        return print_sync_result(sync_links(links, config, args, show_tags=True))
     
     if not args.yes:
         confirm = input("\nStart import? (y/n): ").strip().lower()
@@ -426,28 +3268,9 @@ def cmd_import_chrome(args, config):
             return 0
     
     # import
-    stats = {"success": 0, "skipped": 0, "failed": 0}
-    
-    for bookmark in bookmarks:
-        url = bookmark['url']
-        tags = [t for t in bookmark['tags'] if t and t.strip()]
-        
-        success, status_code, error = create_bookmark(url, tags, config)
-        
-        if success or status_code in [200, 201]:
-            stats["success"] += 1
-            tag_str = " > ".join(tags) if tags else "((no tags))"
-            print(f"  ✓ [{tag_str}] {url[:50]}...")
-        elif status_code == 400:
-            stats["skipped"] += 1
-            print(f"  ⊘ {url[:50]}... (already exists or invalid)")
-        else:
-            stats["failed"] += 1
-            print(f"  ✗ {url[:50]}... (error: {status_code})")
-        
-        time.sleep(0.1)
+    stats = upload_links(links, config, args, show_tags=True)
     
-    print(f"\nImport complete: success {stats['success']}, skipped {stats['skipped']}, failed {stats['failed']}")
+    print(f"\nImport complete: {format_upload_result(stats)}")
     return 0
 
 
@@ -480,8 +3303,9 @@ def cmd_rename_tag(args, config):
         print(f"Replace tag [{old_tag}] with [{', '.join(new_tags_list)}]")
     
     # Get bookmarks with original tag
+    configure_session(args)
     print(f"\nSearching for bookmarks with tag [{old_tag}]...")
-    bookmarks = get_bookmarks_with_tag(old_tag, config)
+    bookmarks = get_bookmarks_with_tag(old_tag, config, args.concurrency)
     
     if bookmarks is None:
         print("Failed to get bookmarks")
@@ -502,48 +3326,168 @@ def cmd_rename_tag(args, config):
     # Execute replacement
     stats = {"replaced": 0, "removed": 0, "failed": 0, "skipped": 0}
     
-    for bookmark in bookmarks:
-        bookmark_id = bookmark.get("id")
-        url = bookmark.get("url", "")
-        current_tags = bookmark.get("tag_names", [])
-        
-        if old_tag not in current_tags:
-            stats["skipped"] += 1
-            continue
-        
-        updated_tags = current_tags.copy()
-        # Find the index of old_tag
-        tag_index = updated_tags.index(old_tag)
-        
-        # Remove old tag
-        updated_tags.pop(tag_index)
-        
-        # Add new tags at the same position (or at the end if out of bounds)
-        # This preserves the position order somewhat
-        for i, new_tag in enumerate(new_tags_list):
-            if new_tag not in updated_tags:
-                updated_tags.insert(tag_index + i, new_tag)
-            # If new_tag already exists, we don't add it again
-        
-        # Determine action
-        if len(new_tags_list) == 1:
-            action = "Replaced"
-        else:
-            action = f"Expanded to {len(new_tags_list)} tags"
-        
-        success, error = update_bookmark_tags(bookmark_id, updated_tags, config)
-        
-        if success:
-            stats["replaced"] += 1
-            print(f"  ✓ {action}: {url[:50]}...")
-        else:
-            stats["failed"] += 1
-            print(f"  ✗ failed: {url[:50]}... ({error})")
+    # Determine action
+    if len(new_tags_list) == 1:
+        action = "Replaced"
+    else:
+        action = f"Expanded to {len(new_tags_list)} tags"
+    
+    def plan(bookmarks):
+        for bookmark in bookmarks:
+            updated_tags = replace_tag(bookmark.get("tag_names", []), old_tag, new_tags_list)
+            if updated_tags is None:
+                stats["skipped"] += 1
+                progress.drop()
+                continue
+            yield bookmark, updated_tags
+    
+    def update(item):
+        bookmark, updated_tags = item
+        return update_bookmark_tags(bookmark.get("id"), updated_tags, config)
+    
+    with Progress.from_args(args, len(bookmarks)) as progress:
+        for (bookmark, tags), (success, error) in run_ordered(update, plan(bookmarks), args.concurrency):
+            url = bookmark.get("url", "")
+            if success:
+                stats["replaced"] += 1
+                progress.report("ok", f"  ✓ {action}: {url[:50]}...", id=bookmark.get("id"), url=url, tags=tags)
+            else:
+                stats["failed"] += 1
+                progress.report("failed", f"  ✗ failed: {url[:50]}... ({error})",
+                                id=bookmark.get("id"), url=url, error=error)
     
+    get_metrics().results.update(stats)
     print(f"\nCompleted: Replaced {stats['replaced']}, skipped {stats['skipped']}, failed {stats['failed']}")
     return 0
 
 
+def cmd_rewrite_tags(args, config):
+    """Apply a tag mapping file: every bookmark is fetched once and PATCHed at most once"""
+    try:
+        mapping = load_tag_mapping(args.mapping)
+    except FileNotFoundError:
+        print(f"error: file does not exist: {args.mapping}")
+        return 1
+    except (ValueError, UnicodeDecodeError) as e:
+        print(f"error: {e}")
+        return 1
+    
+    if not mapping:
+        print("No tag rules found in mapping file")
+        return 0
+    
+    deleted = sum(1 for new_tags in mapping.values() if not new_tags)
+    print(f"Loaded {len(mapping)} rules ({deleted} deletions)")
+    
+    # Fetch the bookmarks of all affected tags into one snapshot
+    configure_session(args)
+    print(f"\nSearching for bookmarks with {len(mapping)} tags...")
+    snapshot = {}
+    
+    def fetch_tag(tag):
+        return fetch_bookmarks(config, query=f"#{tag}", concurrency=1)
+    
+    for tag, bookmarks in run_ordered(fetch_tag, list(mapping), args.concurrency):
+        if bookmarks is None:
+            print(f"Failed to get bookmarks with tag [{tag}]")
+            return 1
+        snapshot.update(bookmarks)
+    
+    # Compute the final tags of every bookmark in memory
+    changes = []
+    for bookmark in snapshot.values():
+        current_tags = bookmark.get("tag_names", [])
+        updated_tags = rewrite_tags(current_tags, mapping)
+        if set(updated_tags) != set(current_tags):
+            changes.append((bookmark, updated_tags))
+    
+    print(f"Found {len(snapshot)} bookmarks, {len(changes)} need updating")
+    if not changes:
+        return 0
+    
+    if args.dry_run:
+        for bookmark, updated_tags in changes:
+            print(f"  {bookmark.get('url', '')[:50]}...")
+            print(f"      [{', '.join(bookmark.get('tag_names', []))}] → [{', '.join(updated_tags)}]")
+        print(f"\nDry run: {len(changes)} bookmarks would be updated")
+        return 0
+    
+    if not args.yes:
+        confirm = input("\nContinue with rewrite? (y/n): ").strip().lower()
+        if confirm != 'y':
+            print("Operation cancelled")
+            return 0
+    
+    stats = {"updated": 0, "failed": 0}
+    
+    def update(item):
+        bookmark, updated_tags = item
+        return update_bookmark_tags(bookmark.get("id"), updated_tags, config)
+    
+    with Progress.from_args(args, len(changes)) as progress:
+        for (bookmark, tags), (success, error) in run_ordered(update, changes, args.concurrency):
+            url = bookmark.get("url", "")
+            if success:
+                stats["updated"] += 1
+                progress.report("ok", f"  ✓ Updated: {url[:50]}...", id=bookmark.get("id"), url=url, tags=tags)
+            else:
+                stats["failed"] += 1
+                progress.report("failed", f"  ✗ failed: {url[:50]}... ({error})",
+                                id=bookmark.get("id"), url=url, error=error)
+    
+    get_metrics().results.update(stats)
+    print(f"\nCompleted: Updated {stats['updated']}, unchanged {len(snapshot) - len(changes)}, failed {stats['failed']}")
+    return 0
+
+
+def cmd_export(args, config):
+    """Export bookmarks to JSONL (optionally gzip compressed) or Netscape HTML
+
+    Pages are fetched in parallel and written as they arrive, so memory use
+    does not grow with the number of bookmarks. The file is written under a
+    temporary name and only replaces the target once the export is complete.
+    """
+    output = Path(args.file)
+    fmt = args.format or export_format(output)
+    compress = args.gzip or output.name.lower().endswith('.gz')
+    format_bookmark, header, footer = EXPORT_FORMATS[fmt]
+    
+    endpoints = [("bookmarks", "/api/bookmarks/")]
+    if not args.no_archived:
+        endpoints.append(("archived", "/api/bookmarks/archived/"))
+    
+    configure_session(args)
+    metrics = get_metrics()
+    stats = {}
+    tmp = output.with_name(output.name + '.tmp')
+    print(f"Exporting to {output} ({fmt}{', gzip' if compress else ''})...")
+    
+    try:
+        with open_output(tmp, compress) as f:
+            f.write(header)
+            for name, endpoint in endpoints:
+                exported = 0
+                bookmarks = iter_bookmarks(config, args.query, args.concurrency, args.page_size, endpoint)
+                for bookmark in bookmarks:
+                    with metrics.phase('write'):
+                        f.write(format_bookmark(bookmark))
+                    exported += 1
+                stats[name] = exported
+                print(f"  ✓ {name}: {exported}")
+            f.write(footer)
+        os.replace(tmp, output)
+    except (RuntimeError, ValueError, OSError) as e:
+        print(f"✗ Export failed: {e}")
+        return 1
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    
+    metrics.results.update(stats)
+    print(f"\nExport completed: {sum(stats.values())} bookmarks written to {output}")
+    return 0
+
+
 # ============================================================
 # Configuration Management Commands
 # ============================================================
@@ -741,6 +3685,8 @@ def cmd_show_config(args):
 
 def interactive_menu(config):
     """Interactive menu"""
+    parser = build_parser()
+    
     while True:
         print("\n" + "=" * 50)
         print("Linkding Tools - Bookmark Management Tool")
@@ -763,34 +3709,24 @@ def interactive_menu(config):
             file_path = input("Please enter Markdown file path: ").strip()
             tag = input("Enter base tag (leave empty to use filename): ").strip() or None
             
-            class Args:
-                pass
-            args = Args()
-            args.file = file_path
-            args.tag = tag
-            args.yes = False
+            argv = ['upload-markdown']
+            if tag:
+                argv.append(f'--tag={tag}')
+            args = parser.parse_args(argv + ['--', file_path])
             
             cmd_upload_markdown(args, config)
         
         elif choice == '2':
             file_path = input("Please enter JSONL file path: ").strip()
             
-            class Args:
-                pass
-            args = Args()
-            args.file = file_path
-            args.yes = False
+            args = parser.parse_args(['upload-jsonl', '--', file_path])
             
             cmd_upload_jsonl(args, config)
         
         elif choice == '3':
-            file_path = input("Enter Chrome bookmarks HTML file path: ").strip()
+            file_path = input("Enter Chrome bookmarks HTML file, Bookmarks file or profile directory: ").strip()
             
-            class Args:
-                pass
-            args = Args()
-            args.file = file_path
-            args.yes = False
+            args = parser.parse_args(['import-chrome', '--', file_path])
             
             cmd_import_chrome(args, config)
         
@@ -798,12 +3734,7 @@ def interactive_menu(config):
             old_tag = input("Enter old tag to replace: ").strip()
             new_tag = input("Enter new tag(s) - use comma to separate multiple tags: ").strip()
             
-            class Args:
-                pass
-            args = Args()
-            args.old_tag = old_tag
-            args.new_tag = new_tag
-            args.yes = False
+            args = parser.parse_args(['rename-tag', '--', old_tag, new_tag])
             
             cmd_rename_tag(args, config)
         
@@ -815,7 +3746,72 @@ def interactive_menu(config):
 # Main Entry Point
 # ============================================================
 
-def main():
+def add_upload_arguments(parser):
+    """Add the options shared by all upload/import commands"""
+    parser.add_argument('-y', '--yes', action='store_true', help='Skip confirmation')
+    parser.add_argument('-j', '--concurrency', type=int, default=4, metavar='N',
+                        help='Number of parallel upload workers (default: 4)')
+    add_rate_argument(parser)
+    parser.add_argument('--no-canonicalize', action='store_true',
+                        help='Only merge duplicates whose URLs are identical (not those with the same canonical form)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Skip links finished by a previous (interrupted) run of the same import')
+    parser.add_argument('--journal', metavar='FILE',
+                        help='Journal of finished links (default: per input file in ~/.cache/linkding-tools/journals)')
+    parser.add_argument('--quarantine', metavar='FILE',
+                        help='Where failed links are written as JSONL (default: <input file>.failed.jsonl, '
+                             'or ~/.cache/linkding-tools/quarantine for browser profiles)')
+    parser.add_argument('--mirror', action='store_true',
+                        help='Skip URLs already on the server using a local SQLite mirror of your bookmarks')
+    parser.add_argument('--refresh-mirror', action='store_true',
+                        help='Rebuild the local mirror from scratch instead of updating it incrementally')
+    parser.add_argument('--check', action='store_true',
+                        help='Ask the server which URLs already exist before creating them, caching the answers')
+    parser.add_argument('--check-ttl', type=float, metavar='HOURS',
+                        help=f'How long cached --check answers are reused (default: {CHECK_CACHE_TTL // 3600})')
+    parser.add_argument('--upsert', action='store_true',
+                        help='Add the tags of URLs that already exist to their bookmarks instead of skipping them')
+    parser.add_argument('--sync', action='store_true',
+                        help='Only send the difference to the server: create new URLs and update changed tags')
+    parser.add_argument('--delete', action='store_true',
+                        help='With --sync (required), also delete URLs that were removed from the source since the last sync')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='With --sync (required), print the plan without changing anything')
+    add_output_arguments(parser)
+    add_run_arguments(parser)
+
+
+def add_output_arguments(parser):
+    """Add the --quiet, --log and --log-format options of commands that change bookmarks"""
+    parser.add_argument('--quiet', action='store_true',
+                        help='Show a progress line instead of one line per item')
+    parser.add_argument('--log', metavar='FILE',
+                        help='Write the per-item results to FILE instead of stdout (implies a progress line)')
+    parser.add_argument('--log-format', choices=('text', 'jsonl'), default='text',
+                        help='Format of the per-item results (default: text)')
+
+
+def add_run_arguments(parser):
+    """Add the --stats, --stats-json and --no-preflight options"""
+    parser.add_argument('--no-preflight', action='store_true',
+                        help='Skip the connection test before the command; the first request checks the token')
+    parser.add_argument('--stats', action='store_true',
+                        help='Print where the time went: phases, per-endpoint latency, status codes, bytes')
+    parser.add_argument('--stats-json', metavar='FILE',
+                        help='Write the same statistics as JSON to FILE (for monitoring)')
+
+
+def add_rate_argument(parser, retries=3):
+    """Add the --max-rate and --retries options used by commands that send many requests"""
+    parser.add_argument('--max-rate', type=float, default=25, metavar='R',
+                        help='Request rate ceiling in requests/s, adapted down automatically when '
+                             'the server is overloaded (default: 25, 0 disables the limiter)')
+    parser.add_argument('--retries', type=int, default=retries, metavar='N',
+                        help='Retries per request for timeouts, connection resets, 429 and 502/503/504 '
+                             f'responses, with exponential backoff (default: {retries})')
+
+
+def build_parser():
     parser = argparse.ArgumentParser(
         description='Linkding Tools - Bookmark Management Toolkit',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -830,7 +3826,11 @@ Examples:
   %(prog)s upload-markdown links.md
   %(prog)s upload-jsonl bookmarks.jsonl
   %(prog)s import-chrome bookmarks.html
+  %(prog)s import-chrome ~/.config/google-chrome/Default
+  %(prog)s import-firefox ~/.mozilla/firefox/abcd1234.default-release
   %(prog)s rename-tag python Python
+  %(prog)s rewrite-tags tags.yaml
+  %(prog)s export backup.jsonl.gz
   %(prog)s  # Enter interactive menu without parameters
         """
     )
@@ -847,28 +3847,79 @@ Examples:
     p_show = subparsers.add_parser('show-config', help='Show current configuration (Token masked)')
     
     # upload-markdown
-    p_md = subparsers.add_parser('upload-markdown', help='Extract links from Markdown file and upload')
-    p_md.add_argument('file', help='Markdown file path')
-    p_md.add_argument('-t', '--tag', help='Base tag (default: use filename)')
-    p_md.add_argument('-y', '--yes', action='store_true', help='Skip confirmation')
+    p_md = subparsers.add_parser('upload-markdown', help='Extract links from Markdown file (or directory) and upload')
+    p_md.add_argument('file', help='Markdown file path, or a directory to import recursively')
+    p_md.add_argument('-t', '--tag', help='Base tag (default: use filename; for a directory, put before the path tags)')
+    p_md.add_argument('--workers', type=int, metavar='N',
+                      help='Processes parsing the files of a directory (default: number of CPUs)')
+    p_md.add_argument('--rescan', action='store_true',
+                      help='Parse every file of a directory, including files unchanged since the last run')
+    add_upload_arguments(p_md)
     
     # upload-jsonl
     p_jsonl = subparsers.add_parser('upload-jsonl', help='Upload links from JSONL file')
     p_jsonl.add_argument('file', help='JSONL file path')
-    p_jsonl.add_argument('-y', '--yes', action='store_true', help='Skip confirmation')
+    add_upload_arguments(p_jsonl)
     
     # import-chrome
     p_chrome = subparsers.add_parser('import-chrome', help='Import Chrome bookmarks')
-    p_chrome.add_argument('file', help='Chrome bookmarks HTML file path')
-    p_chrome.add_argument('-y', '--yes', action='store_true', help='Skip confirmation')
+    p_chrome.add_argument('file', help='Chrome bookmarks HTML export, Bookmarks JSON file or profile directory')
+    add_upload_arguments(p_chrome)
+    
+    # import-firefox
+    p_firefox = subparsers.add_parser('import-firefox', help='Import Firefox bookmarks')
+    p_firefox.add_argument('file', help='Firefox places.sqlite file or profile directory')
+    add_upload_arguments(p_firefox)
     
     # rename-tag
     p_tag = subparsers.add_parser('rename-tag', help='Batch rename/replace tags (supports one-to-many)')
     p_tag.add_argument('old_tag', help='Old tag name')
     p_tag.add_argument('new_tag', help='New tag name(s) - use comma to separate multiple tags (e.g. "tag1,tag2")')
     p_tag.add_argument('-y', '--yes', action='store_true', help='Skip confirmation')
-    
+    p_tag.add_argument('-j', '--concurrency', type=int, default=4, metavar='N',
+                       help='Number of parallel page fetches and updates (default: 4)')
+    add_rate_argument(p_tag, retries=5)
+    add_output_arguments(p_tag)
+    add_run_arguments(p_tag)
+    
+    # rewrite-tags
+    p_rewrite = subparsers.add_parser('rewrite-tags', help='Apply a tag mapping file (YAML or CSV) in one pass')
+    p_rewrite.add_argument('mapping', help='Mapping file: YAML (old: new) or CSV (old,new[,new...])')
+    p_rewrite.add_argument('-y', '--yes', action='store_true', help='Skip confirmation')
+    p_rewrite.add_argument('-j', '--concurrency', type=int, default=4, metavar='N',
+                           help='Number of parallel fetches and updates (default: 4)')
+    p_rewrite.add_argument('--dry-run', action='store_true', help='Show the changes without updating anything')
+    add_rate_argument(p_rewrite, retries=5)
+    add_output_arguments(p_rewrite)
+    add_run_arguments(p_rewrite)
+    
+    # export
+    p_export = subparsers.add_parser('export', help='Export all bookmarks to JSONL (optionally gzip, restorable with upload-jsonl) or Netscape HTML')
+    p_export.add_argument('file', help='Output file; .html/.htm selects HTML, .gz enables gzip')
+    p_export.add_argument('-f', '--format', choices=sorted(EXPORT_FORMATS),
+                          help='Output format (default: from the file extension, else jsonl)')
+    p_export.add_argument('--gzip', action='store_true', help='Compress the output with gzip')
+    p_export.add_argument('-q', '--query', help='Only export bookmarks matching a Linkding search (e.g. "#python")')
+    p_export.add_argument('--no-archived', action='store_true', help='Leave out archived bookmarks')
+    p_export.add_argument('-j', '--concurrency', type=int, default=4, metavar='N',
+                          help='Number of parallel page fetches (default: 4)')
+    p_export.add_argument('--page-size', type=int, default=1000, metavar='N',
+                          help='Bookmarks per page request (default: 1000)')
+    add_rate_argument(p_export, retries=5)
+    add_run_arguments(p_export)
+    
+    return parser
+
+
+def main():
+    parser = build_parser()
     args = parser.parse_args()
+    # Plain uploads would silently ignore these and change the server anyway
+    if hasattr(args, 'sync') and not args.sync and (args.delete or args.dry_run):
+        parser.error("--delete and --dry-run require --sync")
+    # The quarantine file is cleared when a run starts
+    if getattr(args, 'quarantine', None) and Path(args.quarantine).resolve() == Path(args.file).resolve():
+        parser.error("--quarantine must not be the input file")
     
     # Load configuration
     config = load_config()
@@ -912,24 +3963,58 @@ Examples:
         print("  3. Edit .env file")
         return 1
     
-    # Testing connection
-    success, status = test_connection(config)
+    metrics = get_metrics()
+    metrics.enabled = bool(getattr(args, 'stats', False) or getattr(args, 'stats_json', None))
+    
+    # Testing connection (cached for a few minutes per URL and token)
+    success, status = preflight(config, args)
     if not success:
         print(f"✗ API Connection failed: {status}")
         print("\nTip: Run 'uv run linkding-tools test-config' to diagnose the issue")
         return 1
     
     # Execute command
-    if args.command == 'upload-markdown':
-        return cmd_upload_markdown(args, config)
-    elif args.command == 'upload-jsonl':
-        return cmd_upload_jsonl(args, config)
-    elif args.command == 'import-chrome':
-        return cmd_import_chrome(args, config)
-    elif args.command == 'rename-tag':
-        return cmd_rename_tag(args, config)
-    
-    return 0
+    result = 0
+    try:
+        if args.command == 'upload-markdown':
+            result = cmd_upload_markdown(args, config)
+        elif args.command == 'upload-jsonl':
+            result = cmd_upload_jsonl(args, config)
+        elif args.command == 'import-chrome':
+            result = cmd_import_chrome(args, config)
+        elif args.command == 'import-firefox':
+            result = cmd_import_firefox(args, config)
+        elif args.command == 'rename-tag':
+            result = cmd_rename_tag(args, config)
+        elif args.command == 'rewrite-tags':
+            result = cmd_rewrite_tags(args, config)
+        elif args.command == 'export':
+            result = cmd_export(args, config)
+    except AuthenticationError as e:
+        print(f"\n✗ API Connection failed: {e.status}")
+        print("\nTip: Run 'uv run linkding-tools test-config' to diagnose the issue")
+        save_preflight(config, ok=False)
+        result = 1
+    except KeyboardInterrupt:
+        print("Operation interrupted")
+        result = 130
+    
+    session = get_session()
+    if session.authenticated:
+        save_preflight(config)
+    print(session.summary())
+    if session.limiter:
+        print(session.limiter.summary())
+    session.close()
+    
+    if args.stats:
+        print(metrics.summary())
+    if args.stats_json:
+        try:
+            metrics.write_json(args.stats_json)
+        except OSError as e:
+            print(f"Warning: Failed to write statistics - {e}")
+    return result
 
 
 if __name__ == '__main__':